@@ -7,6 +7,8 @@ Compatible with ZeroGPU hardware (harmless @spaces.GPU stub).
 
 from __future__ import annotations
 
+import functools
+import os
 import sys
 from pathlib import Path
 
@@ -17,16 +19,17 @@ if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
 
 import gradio as gr
-import plotly.graph_objects as go
 
 from meti.config import get_settings
-from meti.indicators.tension import calculate_tension_index
-from meti.data.history import get_recent_snapshots, init_db
-from meti.viz.charts import (
-    create_tension_gauge,
-    create_history_chart,
-    create_contribution_bar,
-)
+from meti.data.history import init_db
+from meti.metrics import STAGE_SECONDS
+from meti.profiling import install_signal_handler, profiled
+from meti.scheduler import get_scheduler, start_scheduler
+from meti.viz.dashboard import FIELDS as PAYLOAD_FIELDS, get_payload_cache
+from meti.warmup import get_warmup, start_warmup
+
+# Plotly, pandas and the market data stack are imported on first refresh,
+# not at startup, so the server comes up as soon as Gradio is ready.
 
 # ---------------------------------------------------------------------------
 # ZeroGPU compatibility (HF Spaces)
@@ -186,14 +189,57 @@ footer { display: none !important; }
 # Core update function
 # ---------------------------------------------------------------------------
 
-def refresh_data():
-    """Fetch latest data and build all UI components."""
+@functools.lru_cache(maxsize=2 * len(PAYLOAD_FIELDS))
+def _plot(figure_json: str):
+    """Plotly figure for a pre-serialized payload chart, parsed once per chart.
+
+    Figures are shared by every session and must not be modified.
+    """
+    import plotly.io as pio
+
+    return pio.from_json(figure_json)
+
+
+def _payload_outputs(payload, seen_version: int = 0, sent: set[str] = frozenset()) -> tuple:
+    """Dashboard outputs for `payload`, then the payload version.
+
+    Fields unchanged since `seen_version`, already `sent`, or not rendered
+    yet are skipped; the version goes out once the payload is complete.
+    """
+    updates = payload.updates_since(seen_version)
+    outputs = []
+    for name in PAYLOAD_FIELDS:
+        if name not in updates or name in sent:
+            outputs.append(gr.skip())
+        elif name.endswith("_json"):
+            outputs.append(_plot(updates[name]))
+        else:
+            outputs.append(updates[name])
+    outputs.append(payload.version if payload.complete else gr.skip())
+    return tuple(outputs)
+
+
+@profiled("refresh_data")
+def refresh_data(force: bool = False, seen_version: int = 0):
+    """Stream the shared dashboard payload for the scheduler's latest result.
+
+    Yields the score and gauge first, then the asset cards and
+    contribution bar, then the history chart, skipping whatever the page
+    already shows as of `seen_version`. With `force`, ask the scheduler
+    for a fresh computation first.
+    """
     settings = get_settings()
     try:
         # Touch the GPU stub once so ZeroGPU runtime is happy
         _gpu_warmup()
-        result = calculate_tension_index(settings=settings, persist=True)
+        scheduler = get_scheduler(settings)
+        with STAGE_SECONDS.time(stage="ui.result"):
+            result = scheduler.refresh() if force else scheduler.wait_for_result()
+        if result is None:
+            raise TimeoutError("No tension result available yet")
     except Exception as e:
+        import plotly.graph_objects as go
+
         empty = go.Figure()
         empty.update_layout(
             paper_bgcolor="rgba(0,0,0,0)",
@@ -212,84 +258,43 @@ def refresh_data():
           <div class="raw-index">Could not fetch market data</div>
         </div>
         """
-        return empty, err_html, "Error", "<p style='color:#94a3b8'>Retry in a moment.</p>", empty, empty, "Update failed"
-
-    score = result["tension_score"]
-    regime = result["regime"]
-    raw = result["raw_index"]
-
-    gauge = create_tension_gauge(score, settings)
-
-    regime_class = {
-        "Calm": "regime-calm",
-        "Elevated": "regime-elevated",
-        "High": "regime-high",
-        "Critical": "regime-critical",
-    }.get(regime, "regime-calm")
-
-    score_html = f"""
-    <div class="score-box">
-      <div class="score-value">{score}</div>
-      <div class="{regime_class}">{regime}</div>
-      <div class="raw-index">Raw index: {raw:+.3f}</div>
-    </div>
-    """
+        yield empty, err_html, "Error", "<p style='color:#94a3b8'>Retry in a moment.</p>", empty, empty, "Update failed", 0
+        return
 
-    # Richer asset cards with per-timeframe chips
-    tf_labels = {"1h": "1H", "4h": "4H", "1d": "1D", "1wk": "1W"}
-    cards = ['<div class="asset-grid">']
-    for ticker, info in result["contributions"].items():
-        change = info["weighted_change"]
-        sign = "▲" if change >= 0 else "▼"
-        ch_class = "asset-change-up" if change >= 0 else "asset-change-down"
-        price = info["current_price"]
-        price_str = f"${price:,.2f}" if price else "—"
-
-        chips = []
-        for tf_key, pct in info.get("changes", {}).items():
-            label = tf_labels.get(tf_key, tf_key)
-            chip_color = "#34d399" if pct >= 0 else "#f87171"
-            chips.append(
-                f'<span class="tf-chip" style="color:{chip_color}">{label} {pct:+.2f}%</span>'
-            )
-        chips_html = "".join(chips)
-
-        cards.append(f"""
-        <div class="asset-card">
-          <div class="asset-header">
-            <div>
-              <span style="font-size:1.25rem">{info['emoji']}</span>
-              <span class="asset-name" style="color:{info['color']}; margin-left:0.35rem">{info['name']}</span>
-              <span class="asset-weight"> · {info['weight']*100:.0f}%</span>
-            </div>
-            <div style="text-align:right">
-              <div class="asset-price">{price_str}</div>
-              <div class="{ch_class}">{sign} {abs(change):.2f}%</div>
-            </div>
-          </div>
-          <div class="tf-row">{chips_html}</div>
-        </div>
-        """)
-    cards.append("</div>")
-    assets_html = "\n".join(cards)
+    # Figures and HTML are rendered once per result and shared by all sessions
+    sent: set[str] = set()
+    for payload in get_payload_cache(settings).stream(result):
+        if payload.complete or set(payload.updates_since(seen_version)) - sent:
+            yield _payload_outputs(payload, seen_version, sent)
+        sent.update(payload.fields)
 
-    contrib_fig = create_contribution_bar(result["contributions"])
-    snapshots = get_recent_snapshots(days=30)
-    history_fig = create_history_chart(snapshots)
 
-    ts = result["timestamp"][:19].replace("T", " ") + " UTC"
-    status = f"Last updated: **{ts}**"
+def push_update(seen_version: int):
+    """Timer tick: send the shared payload if it is newer than this page's.
 
-    return gauge, score_html, regime, assets_html, contrib_fig, history_fig, status
+    Never computes anything; the scheduler is the only producer.
+    """
+    payload = get_payload_cache().latest()
+    if payload is None or payload.version == seen_version:
+        return (gr.skip(),) * (len(PAYLOAD_FIELDS) + 1)
+    return _payload_outputs(payload, seen_version)
 
 
 # ---------------------------------------------------------------------------
 # Build the Gradio interface
 # ---------------------------------------------------------------------------
 
+@profiled("build_demo", first_call=True)
 def build_demo() -> gr.Blocks:
     settings = get_settings()
     init_db()
+    # Render each new result as soon as the scheduler produces it
+    get_scheduler(settings).add_listener(get_payload_cache(settings).get)
+    if settings.app.warmup:
+        # Fetch, compute and render in the background before the first visitor
+        start_warmup(settings, render=refresh_data)
+    else:
+        start_scheduler(settings)
 
     # Gradio 6+: theme & css belong on launch(), not Blocks()
     with gr.Blocks(title=f"{settings.app.short_name} – {settings.app.title}") as demo:
@@ -316,6 +321,7 @@ def build_demo() -> gr.Blocks:
                             "<div class='score-box'><div class='score-value'>…</div></div>"
                         )
                         regime_state = gr.State("—")
+                        version_state = gr.State(0)
 
                 gr.HTML("<div class='section-label'>Market Assets</div>")
                 assets_html = gr.HTML("<p style='color:#64748b'>Loading…</p>")
@@ -326,7 +332,11 @@ def build_demo() -> gr.Blocks:
             # ---------- History ----------
             with gr.Tab("History"):
                 gr.Markdown(
-                    "Snapshots are saved automatically each time data is refreshed. "
+                    f"The dashboard updates itself every {settings.app.refresh_seconds} seconds. "
+                    "Snapshots are saved automatically every "
+                    f"{settings.history.snapshot_interval_minutes} minutes and on manual refresh "
+                    f"(at most once every {get_scheduler(settings).refresh_interval:g} seconds; "
+                    "a newer result is shown as is). "
                     "History lives in a local SQLite file (or on the Space volume)."
                 )
                 history_plot = gr.Plot(label="", show_label=False)
@@ -411,11 +421,27 @@ This project turns that observation into an open, transparent tool so anyone can
             contrib_plot,
             history_plot,
             status_text,
+            version_state,
         ]
 
-        refresh_btn.click(fn=refresh_data, inputs=None, outputs=outputs)
+        def force_refresh(seen_version: int):
+            # A generator function itself, so Gradio streams its updates
+            yield from refresh_data(force=True, seen_version=seen_version)
+
+        refresh_btn.click(fn=force_refresh, inputs=version_state, outputs=outputs)
         demo.load(fn=refresh_data, inputs=None, outputs=outputs)
 
+        # Live updates: each page polls the shared payload's version and only
+        # receives data when the scheduler has published a newer result
+        push_timer = gr.Timer(settings.app.push_seconds)
+        push_timer.tick(
+            fn=push_update,
+            inputs=version_state,
+            outputs=outputs,
+            show_progress="hidden",
+            queue=False,
+        )
+
     return demo
 
 
@@ -423,6 +449,7 @@ This project turns that observation into an open, transparent tool so anyone can
 # Entry point
 # ---------------------------------------------------------------------------
 
+install_signal_handler()
 demo = build_demo()
 
 # Theme + CSS are passed to launch() (Gradio 6+ requirement)
@@ -442,13 +469,42 @@ _THEME = gr.themes.Soft(
     button_primary_background_fill_hover="#2563eb",
 )
 
+
+def _serve(settings) -> None:
+    """Serve the Gradio app with health, readiness and metrics endpoints."""
+    import uvicorn
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse, PlainTextResponse
+
+    server = FastAPI()
+
+    @server.get("/healthz", include_in_schema=False)
+    def healthz() -> JSONResponse:
+        return JSONResponse({"status": "ok"})
+
+    @server.get("/readyz", include_in_schema=False)
+    def readyz() -> JSONResponse:
+        if not settings.app.warmup:
+            return JSONResponse({"ready": True})
+        status = get_warmup(settings).status()
+        return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+    if settings.metrics.enabled:
+        from meti.metrics import CONTENT_TYPE, render
+
+        @server.get(settings.metrics.path, include_in_schema=False)
+        def metrics() -> PlainTextResponse:
+            return PlainTextResponse(render(), media_type=CONTENT_TYPE)
+
+    server = gr.mount_gradio_app(server, demo, path="/", theme=_THEME, css=CUSTOM_CSS)
+    # Honour Gradio's launch environment (as set by HF Spaces) over the config
+    host = os.environ.get("GRADIO_SERVER_NAME") or settings.app.server_name
+    port = int(os.environ.get("GRADIO_SERVER_PORT") or settings.app.server_port)
+    uvicorn.run(server, host=host, port=port)
+
+
 if __name__ == "__main__":
-    demo.launch(
-        server_name="0.0.0.0",
-        server_port=7860,
-        theme=_THEME,
-        css=CUSTOM_CSS,
-    )
+    _serve(get_settings())
 else:
     # When imported by HF Spaces / Gradio loader, attach theme & css
     # so the runtime still picks them up.
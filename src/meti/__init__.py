@@ -3,10 +3,25 @@ Middle-East Tension Indicator (METI)
 A real-time market-based geopolitical tension gauge.
 """
 
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from ._lazy import lazy_exports
+
 __version__ = "1.0.0"
 __author__ = "Kiarash Shayegani"
 
-from .config import get_settings
-from .indicators.tension import calculate_tension_index
+# Exports are imported on first access so `import meti` stays cheap
+_EXPORTS = {
+    "get_settings": ".config",
+    "calculate_tension_index": ".indicators.tension",
+}
+
+if TYPE_CHECKING:
+    from .config import get_settings
+    from .indicators.tension import calculate_tension_index
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = ["get_settings", "calculate_tension_index", "__version__"]
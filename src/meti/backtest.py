@@ -0,0 +1,279 @@
+"""Parallel weight and normalization sweeps over stored bar history.
+
+Stored bars are loaded once and turned into a (time, asset, timeframe)
+change tensor, which is placed in shared memory. Candidate `Settings`
+variants that differ in asset weights/directions, timeframe weights or
+normalization are then scored on a process pool: each chunk of variants
+is a single matrix product against the shared tensor.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Any, Iterable
+
+import numpy as np
+import pandas as pd
+
+from meti.config import Settings, get_settings
+from meti.data.backends import MarketDataProvider
+from meti.indicators.backfill import compute_change_tensor
+from meti.indicators.tension import REGIMES, compile_weights, normalize_array
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class ChangeTensor:
+    """Percent changes of every asset over every timeframe at each timestamp."""
+
+    grid: pd.DatetimeIndex
+    tickers: tuple[str, ...]
+    timeframes: tuple[str, ...]
+    changes: np.ndarray  # (T, A, F)
+    # (interval, lookback_bars) per timeframe the changes were computed with
+    timeframe_specs: tuple[tuple[str, int], ...] = ()
+
+
+@dataclass
+class VariantResult:
+    index: int
+    stats: dict[str, float]
+    scores: np.ndarray | None = field(default=None, repr=False)
+
+
+def load_change_tensor(
+    settings: Settings | None = None,
+    interval: str = "1h",
+    since: pd.Timestamp | None = None,
+    provider: MarketDataProvider | None = None,
+) -> ChangeTensor:
+    """
+    Build the change tensor from stored bars since `since` (default: the
+    last `history.keep_days`).
+
+    Tickers whose stored bars don't reach back to `since` are downloaded
+    from `provider` (default: the configured backend) and added to the bar
+    store first, so later sweeps read them locally.
+    """
+    from meti.data.backends import get_provider
+    from meti.data.bars import get_bar_store
+    from meti.data.providers import fetch_bars_batch
+
+    settings = settings or get_settings()
+    provider = provider or get_provider(settings)
+    store = get_bar_store(settings, provider.name)
+    if since is None:
+        since = provider.now() - pd.Timedelta(days=settings.history.keep_days)
+    since = pd.Timestamp(since)
+    since = since.tz_localize("UTC") if since.tz is None else since
+
+    closes = {t: store.load_closes(t, interval, since=since) for t in settings.assets}
+    # Weekends and holidays can leave a few days without bars after `since`
+    slack = pd.Timedelta(days=4)
+    uncovered = [t for t, c in closes.items() if c.empty or c.index[0] > since + slack]
+    if uncovered:
+        bars = fetch_bars_batch(
+            uncovered,
+            interval,
+            start=since,
+            timeout=settings.data.fetch_timeout_seconds * 3,
+            provider=provider,
+        )
+        for ticker, frame in bars.items():
+            store.append(ticker, interval, frame)
+            closes[ticker] = store.load_closes(ticker, interval, since=since)
+    return build_change_tensor(closes, interval, settings)
+
+
+def build_change_tensor(
+    closes: dict[str, pd.Series],
+    base_interval: str,
+    settings: Settings | None = None,
+) -> ChangeTensor:
+    """
+    Build the change tensor from Close series sampled at `base_interval`.
+
+    Raises ValueError when no timestamp has enough history for every
+    timeframe.
+    """
+    settings = settings or get_settings()
+    weights = compile_weights(settings)
+    grid, changes, _ = compute_change_tensor(closes, base_interval, settings)
+    if len(grid) == 0:
+        raise ValueError(
+            f"No {base_interval} bar history long enough for every timeframe; "
+            "load more history (e.g. with run_backfill) first"
+        )
+    return ChangeTensor(
+        grid=grid,
+        tickers=weights.tickers,
+        timeframes=weights.timeframes,
+        changes=np.ascontiguousarray(changes),
+        timeframe_specs=tuple(
+            (settings.timeframes[k].interval, settings.timeframes[k].lookback_bars)
+            for k in weights.timeframes
+        ),
+    )
+
+
+def make_variants(base: Settings, grid: dict[str, Iterable[Any]]) -> list[Settings]:
+    """
+    Cartesian product of parameter values applied to `base`.
+
+    Keys are dotted paths into the settings, e.g. "assets.CL=F.weight",
+    "timeframes.1d.weight" or "normalization.max_positive".
+    """
+    keys = list(grid)
+    variants = []
+    for values in itertools.product(*(list(grid[k]) for k in keys)):
+        data = base.model_dump()
+        for key, value in zip(keys, values):
+            node = data
+            *parents, leaf = key.split(".")
+            for part in parents:
+                node = node[part]
+            if leaf not in node:
+                raise KeyError(f"Unknown settings path: {key}")
+            node[leaf] = value
+        variants.append(Settings(**data))
+    return variants
+
+
+def _variant_params(variant: Settings, tensor: ChangeTensor) -> tuple[np.ndarray, tuple]:
+    """Flattened (A*F,) weight vector and normalization args for one variant."""
+    specs = tuple(
+        (variant.timeframes[k].interval, variant.timeframes[k].lookback_bars)
+        for k in tensor.timeframes
+        if k in variant.timeframes
+    )
+    if set(variant.timeframes) != set(tensor.timeframes) or specs != tensor.timeframe_specs:
+        raise ValueError("Variants may change timeframe weights only, not intervals or lookbacks")
+
+    asset_weights = np.array(
+        [
+            variant.assets[t].weight * variant.assets[t].direction if t in variant.assets else 0.0
+            for t in tensor.tickers
+        ]
+    )
+    tf_weights = np.array([variant.timeframes[k].weight for k in tensor.timeframes])
+    norm = variant.normalization
+    return (
+        np.outer(asset_weights, tf_weights).ravel(),
+        (norm.baseline, norm.max_positive, norm.max_negative, norm.clamp_min, norm.clamp_max),
+    )
+
+
+def _summarize(scores: np.ndarray, raw: np.ndarray) -> dict[str, float]:
+    stats = {
+        "mean": float(scores.mean()),
+        "std": float(scores.std()),
+        "min": float(scores.min()),
+        "max": float(scores.max()),
+        "p95": float(np.percentile(scores, 95)),
+        "last": float(scores[-1]),
+        "raw_mean": float(raw.mean()),
+        "raw_std": float(raw.std()),
+    }
+    bounds = [lowest for _, lowest in REGIMES[1:]] + [np.inf]
+    for (name, lowest), upper in zip(REGIMES, bounds):
+        stats[f"share_{name.lower()}"] = float(((scores >= lowest) & (scores < upper)).mean())
+    return stats
+
+
+def _evaluate(
+    changes: np.ndarray,
+    chunk: list[tuple[int, np.ndarray, tuple]],
+    keep_series: bool,
+) -> list[VariantResult]:
+    flat = changes.reshape(changes.shape[0], -1)
+    # One GEMM for the whole chunk: (T, A*F) @ (A*F, K) -> (T, K)
+    raws = flat @ np.stack([w for _, w, _ in chunk], axis=1)
+    results = []
+    for k, (index, _, norm) in enumerate(chunk):
+        raw = raws[:, k]
+        scores = normalize_array(raw, *norm)
+        results.append(
+            VariantResult(
+                index=index,
+                stats=_summarize(scores, raw),
+                scores=scores.astype(np.int16) if keep_series else None,
+            )
+        )
+    return results
+
+
+# Worker-side view of the shared change tensor
+_worker_shm: shared_memory.SharedMemory | None = None
+_worker_changes: np.ndarray | None = None
+
+
+def _init_worker(name: str, shape: tuple[int, ...]) -> None:
+    global _worker_shm, _worker_changes
+    _worker_shm = shared_memory.SharedMemory(name=name)
+    _worker_changes = np.ndarray(shape, dtype=np.float64, buffer=_worker_shm.buf)
+
+
+def _evaluate_shared(chunk: list[tuple[int, np.ndarray, tuple]], keep_series: bool) -> list[VariantResult]:
+    return _evaluate(_worker_changes, chunk, keep_series)
+
+
+def run_sweep(
+    variants: list[Settings],
+    tensor: ChangeTensor,
+    processes: int | None = None,
+    chunk_size: int = 64,
+    keep_series: bool = False,
+) -> list[VariantResult]:
+    """
+    Score every variant over the change tensor.
+
+    Results come back in variant order with summary statistics (mean, std,
+    min, max, p95, last score, raw mean/std and the share of time in each
+    regime); `keep_series` also returns each variant's int16 score series.
+    `processes` defaults to the CPU count; 0 or 1 evaluates in-process.
+    """
+    if len(tensor.grid) == 0:
+        raise ValueError("Change tensor is empty; load more bar history first")
+
+    params = [(i, *_variant_params(v, tensor)) for i, v in enumerate(variants)]
+    chunks = [params[i : i + chunk_size] for i in range(0, len(params), chunk_size)]
+    if processes is None:
+        processes = os.cpu_count() or 1
+
+    if processes <= 1 or len(chunks) == 1:
+        results = [r for chunk in chunks for r in _evaluate(tensor.changes, chunk, keep_series)]
+        return sorted(results, key=lambda r: r.index)
+
+    shm = shared_memory.SharedMemory(create=True, size=tensor.changes.nbytes)
+    try:
+        shared = np.ndarray(tensor.changes.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = tensor.changes
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            initializer=_init_worker,
+            initargs=(shm.name, tensor.changes.shape),
+        ) as pool:
+            futures = [pool.submit(_evaluate_shared, chunk, keep_series) for chunk in chunks]
+            results = [r for fut in futures for r in fut.result()]
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+    return sorted(results, key=lambda r: r.index)
+
+
+def sweep_table(variants: list[Settings], results: list[VariantResult]) -> pd.DataFrame:
+    """One row per variant: its weights and normalization plus summary stats."""
+    rows = []
+    for variant, result in zip(variants, results):
+        row: dict[str, Any] = {f"w_{t}": a.weight for t, a in variant.assets.items()}
+        row.update({f"tf_{k}": tf.weight for k, tf in variant.timeframes.items()})
+        row.update({f"norm_{k}": v for k, v in variant.normalization.model_dump().items()})
+        row.update(result.stats)
+        rows.append(row)
+    return pd.DataFrame(rows)
@@ -0,0 +1,422 @@
+"""Benchmarks for METI's refresh pipeline.
+
+Times each stage of a dashboard refresh against an offline provider
+(seeded synthetic market by default, or recorded replay files) with the
+history DB and bar store in a temporary directory:
+
+    python -m meti.bench --output bench.json
+    python -m meti.bench --baseline bench.json --threshold 0.25
+
+Cold-start cost is tracked too: each of `IMPORT_TARGETS` is imported in
+a fresh interpreter under ``python -X importtime``, and importing one of
+the `LIGHT_IMPORTS` must not load any of `HEAVY_MODULES`.
+
+Results are written as JSON. Given a baseline, every benchmark whose
+median got slower by more than the threshold is reported as a regression
+and the command exits with status 1, as it does for a light import that
+pulls in a heavy dependency.
+
+The benchmarks reconfigure the process-wide settings, so run them in
+their own process rather than inside the app.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+# Fixed "now" for the synthetic market, so every run sees the same bars
+SYNTHETIC_ANCHOR = "2026-01-14 15:00"
+
+IMPORT_TARGETS = (
+    "meti",
+    "meti.config",
+    "meti.data",
+    "meti.indicators",
+    "meti.data.history",
+    "meti.scheduler",
+    "meti.indicators.tension",
+    "meti.data.providers",
+    "meti.cli",
+)
+HEAVY_MODULES = ("numpy", "pandas", "yfinance", "plotly", "gradio")
+# Imports on the startup path that must not load any heavy module
+LIGHT_IMPORTS = (
+    "meti",
+    "meti.config",
+    "meti.data",
+    "meti.indicators",
+    "meti.data.history",
+    "meti.scheduler",
+    "meti.cli",
+)
+
+
+@dataclass
+class Benchmark:
+    name: str
+    fn: Callable[[], Any]
+    setup: Callable[[], None] | None = None  # runs untimed before every round
+
+
+@dataclass
+class BenchResult:
+    name: str
+    timings: list[float] = field(repr=False)
+
+    def summary(self) -> dict[str, float]:
+        ordered = sorted(self.timings)
+        return {
+            "rounds": len(ordered),
+            "min": ordered[0],
+            "median": statistics.median(ordered),
+            "mean": statistics.fmean(ordered),
+            "p95": ordered[min(len(ordered) - 1, round(0.95 * (len(ordered) - 1)))],
+            "stdev": statistics.pstdev(ordered),
+        }
+
+
+def _configure(provider: str, workdir: Path, latency: float) -> None:
+    """Point the process-wide settings at an offline provider and temp storage."""
+    from meti.config import get_settings
+
+    settings = get_settings()
+    settings.history.db_path = str(workdir / "history.db")
+    settings.data.provider = provider
+    settings.data.synthetic_anchor = SYNTHETIC_ANCHOR
+    settings.data.synthetic_latency_seconds = latency
+    settings.data.synthetic_error_rate = 0.0
+    # Every round must do the work rather than reuse a coalesced result
+    settings.app.coalesce_seconds = 0.0
+    settings.app.refresh_min_seconds = 0.0
+
+
+def _check_inputs(asset_data: dict[str, Any]) -> None:
+    """Refuse to time a pipeline whose inputs are missing or all zero."""
+    problems = []
+    for ticker, info in asset_data.items():
+        if info.get("missing"):
+            problems.append(f"{ticker} missing {info['missing']}")
+        elif info["current_price"] <= 0 or not any(info["changes"].values()):
+            problems.append(f"{ticker} has no price or only zero changes")
+    if problems:
+        raise RuntimeError("Benchmark inputs are degraded: " + "; ".join(problems))
+
+
+def _load_app() -> Any | None:
+    """Import app.py from the project root, or None if it is unavailable."""
+    path = Path(__file__).resolve().parents[2] / "app.py"
+    if not path.exists() or importlib.util.find_spec("gradio") is None:
+        return None
+    spec = importlib.util.spec_from_file_location("meti_bench_app", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_benchmarks(include_app: bool = True) -> list[Benchmark]:
+    """The benchmark cases, in pipeline order; settings must be configured."""
+    from meti.config import get_settings
+    from meti.data.cache import get_cache
+    from meti.data.history import get_recent_snapshots, init_db, save_snapshot, save_snapshots
+    from meti.data.providers import fetch_bars_batch, get_all_asset_data
+    from meti.indicators.backfill import compute_backfill
+    from meti.indicators.tension import calculate_tension_index
+    from meti.viz.charts import (
+        create_contribution_bar,
+        create_history_chart,
+        create_tension_gauge,
+    )
+
+    settings = get_settings()
+    init_db()
+
+    # A few months of hourly history so reads and the history chart have work to do
+    bars = fetch_bars_batch(list(settings.assets), "1h", period="3mo")
+    history = compute_backfill({t: b["Close"] for t, b in bars.items()}, "1h", settings)
+    if not history.empty:
+        save_snapshots(
+            ts_epoch=history.index.as_unit("ms").asi8,
+            raw_index=history["raw_index"].to_numpy(),
+            tension_score=history["tension_score"].to_numpy(),
+            asset_changes={t: history[t].to_numpy() for t in bars if t in history.columns},
+            details=json.dumps({"source": "bench"}),
+        )
+
+    clear_cache = get_cache().clear
+    result = calculate_tension_index(settings, persist=False)
+    # Timings of a path that only yields zeros would mean nothing
+    _check_inputs(get_all_asset_data(settings))
+    _check_inputs(result["assets"])
+    snapshots = get_recent_snapshots(days=settings.history.keep_days)
+
+    cases = [
+        Benchmark("get_all_asset_data", lambda: get_all_asset_data(settings), clear_cache),
+        Benchmark(
+            "calculate_tension_index",
+            lambda: calculate_tension_index(settings, persist=False),
+            clear_cache,
+        ),
+        Benchmark(
+            "save_snapshot",
+            lambda: save_snapshot(
+                raw_index=result["raw_index"],
+                tension_score=result["tension_score"],
+                asset_changes={t: c["weighted_change"] for t, c in result["contributions"].items()},
+            ),
+        ),
+        Benchmark(
+            "get_recent_snapshots",
+            lambda: get_recent_snapshots(days=settings.history.keep_days),
+        ),
+        Benchmark(
+            "charts.create_tension_gauge",
+            lambda: create_tension_gauge(result["tension_score"], settings),
+        ),
+        Benchmark(
+            "charts.create_history_chart",
+            lambda: create_history_chart(snapshots),
+        ),
+        Benchmark(
+            "charts.create_contribution_bar",
+            lambda: create_contribution_bar(result["contributions"]),
+        ),
+    ]
+
+    app = _load_app() if include_app else None
+    if app is not None:
+        cases += [
+            # refresh_data streams its updates; time the whole stream
+            Benchmark("app.refresh_data", lambda: deque(app.refresh_data(), maxlen=0)),
+            Benchmark(
+                "app.refresh_data[force]",
+                lambda: deque(app.refresh_data(force=True), maxlen=0),
+                clear_cache,
+            ),
+        ]
+    return cases
+
+
+def run_benchmark(bench: Benchmark, rounds: int = 20, warmup: int = 2) -> BenchResult:
+    timings = []
+    for i in range(warmup + rounds):
+        if bench.setup is not None:
+            bench.setup()
+        start = time.perf_counter()
+        bench.fn()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            timings.append(elapsed)
+    return BenchResult(bench.name, timings)
+
+
+def run_benchmarks(
+    provider: str = "synthetic",
+    rounds: int = 20,
+    warmup: int = 2,
+    only: list[str] | None = None,
+    latency: float = 0.0,
+    include_app: bool = True,
+) -> dict[str, Any]:
+    """
+    Run the suite and return a JSON-ready report.
+
+    `only` keeps benchmarks whose name contains any of the given strings;
+    `latency` adds simulated network latency to synthetic downloads.
+    """
+    with tempfile.TemporaryDirectory(prefix="meti-bench-") as tmp:
+        _configure(provider, Path(tmp), latency)
+        cases = build_benchmarks(include_app=include_app)
+        if only:
+            cases = [b for b in cases if any(s in b.name for s in only)]
+        results = {b.name: run_benchmark(b, rounds, warmup).summary() for b in cases}
+
+        from meti.data.history import close_db
+        from meti.scheduler import get_scheduler
+
+        get_scheduler().stop(timeout=5)
+        close_db()
+
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "provider": provider,
+        "latency": latency,
+        "results": results,
+    }
+
+
+def _import_time(module: str) -> tuple[float, list[str]]:
+    """
+    Cumulative `-X importtime` cost of `import module` in a fresh
+    interpreter (seconds), and the heavy modules it loaded.
+    """
+    src = str(Path(__file__).resolve().parents[1])
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, (src, env.get("PYTHONPATH"))))
+    code = (
+        "import sys; sys.stderr.write('--start--\\n'); "
+        f"import {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    total_us = 0
+    started = False
+    for line in proc.stderr.splitlines():
+        if line == "--start--":
+            started = True
+            continue
+        parts = line.split("|")
+        if not started or len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        # Top-level entries have one space before the module name, nested ones more
+        name = parts[2]
+        if len(name) - len(name.lstrip()) == 1:
+            total_us += int(parts[1])
+    heavy = [m for m in proc.stdout.strip().split(",") if m]
+    return total_us / 1e6, heavy
+
+
+def run_import_benchmarks(
+    rounds: int = 5,
+    targets: tuple[str, ...] = IMPORT_TARGETS,
+) -> tuple[dict[str, dict[str, float]], dict[str, list[str]]]:
+    """Import-time summaries keyed "import:<module>", and heavy modules per target."""
+    results, heavy = {}, {}
+    for module in targets:
+        timings = []
+        for _ in range(rounds):
+            seconds, loaded = _import_time(module)
+            timings.append(seconds)
+        results[f"import:{module}"] = BenchResult(module, timings).summary()
+        heavy[module] = loaded
+    return results, heavy
+
+
+def heavy_import_violations(heavy: dict[str, list[str]]) -> list[str]:
+    """Light imports that loaded a heavy dependency, as "module: deps" strings."""
+    return [
+        f"{module}: {', '.join(loaded)}"
+        for module, loaded in heavy.items()
+        if module in LIGHT_IMPORTS and loaded
+    ]
+
+
+def compare(
+    report: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float = 0.2,
+) -> list[dict[str, Any]]:
+    """
+    Compare medians against a baseline report.
+
+    Returns one row per benchmark present in both, with the ratio of the
+    current to the baseline median and whether it exceeds 1 + threshold.
+    """
+    rows = []
+    for name, current in report["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None or base["median"] <= 0:
+            continue
+        ratio = current["median"] / base["median"]
+        rows.append(
+            {
+                "name": name,
+                "baseline": base["median"],
+                "current": current["median"],
+                "ratio": ratio,
+                "regression": ratio > 1.0 + threshold,
+            }
+        )
+    return rows
+
+
+def _format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:10.3f}"
+
+
+def format_report(report: dict[str, Any], comparison: list[dict[str, Any]] | None = None) -> str:
+    ratios = {row["name"]: row for row in comparison or []}
+    lines = [f"{'benchmark':34} {'median ms':>10} {'p95 ms':>10} {'min ms':>10}  vs baseline"]
+    for name, stats in report["results"].items():
+        line = f"{name:34} {_format_ms(stats['median'])} {_format_ms(stats['p95'])} {_format_ms(stats['min'])}"
+        row = ratios.get(name)
+        if row is not None:
+            line += f"  {row['ratio']:.2f}x" + ("  REGRESSION" if row["regression"] else "")
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="meti bench", description=__doc__.splitlines()[0])
+    parser.add_argument("--provider", choices=("synthetic", "replay"), default="synthetic")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.0, help="synthetic latency, seconds")
+    parser.add_argument("--only", action="append", help="run benchmarks matching this name")
+    parser.add_argument("--no-app", action="store_true", help="skip app.refresh_data")
+    parser.add_argument("--import-rounds", type=int, default=5, help="0 skips import timing")
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--baseline", type=Path, help="compare against this results JSON")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed slowdown (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        provider=args.provider,
+        rounds=args.rounds,
+        warmup=args.warmup,
+        only=args.only,
+        latency=args.latency,
+        include_app=not args.no_app,
+    )
+    violations: list[str] = []
+    if args.import_rounds > 0:
+        targets = tuple(
+            m for m in IMPORT_TARGETS if not args.only or any(s in f"import:{m}" for s in args.only)
+        )
+        import_results, heavy = run_import_benchmarks(args.import_rounds, targets)
+        report["results"].update(import_results)
+        report["heavy_imports"] = heavy
+        violations = heavy_import_violations(heavy)
+
+    comparison = None
+    if args.baseline is not None:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        comparison = compare(report, baseline, args.threshold)
+        report["baseline"] = {"path": str(args.baseline), "threshold": args.threshold}
+        report["comparison"] = comparison
+
+    print(format_report(report, comparison))
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    for violation in violations:
+        print(f"Heavy import on the startup path: {violation}", file=sys.stderr)
+    regressions = [row["name"] for row in comparison or [] if row["regression"]]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+    return 1 if regressions or violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
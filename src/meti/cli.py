@@ -0,0 +1,166 @@
+"""Headless command line for METI.
+
+Computes and stores tension snapshots without the web UI, so the
+collector can run as a cron job or a small sidecar next to the app:
+
+    meti compute --once          # one snapshot, e.g. from cron
+    meti daemon --interval 900   # compute and store every 15 minutes
+    meti export --days 30 --format csv > history.csv
+
+None of these import gradio or plotly. ``meti bench`` and
+``meti profile`` forward to `meti.bench` and `meti.profiling`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import importlib
+import json
+import logging
+import sys
+import time
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def _summary(result: dict[str, Any]) -> str:
+    return (
+        f"{result['timestamp']}  score {result['tension_score']} ({result['regime']})"
+        f"  raw {result['raw_index']:+.3f}"
+    )
+
+
+def _compute(args: argparse.Namespace) -> int:
+    from meti.config import get_settings
+    from meti.data.bars import prune_bar_store
+    from meti.data.history import init_db, prune_old_snapshots
+    from meti.indicators.tension import calculate_tension_index
+
+    settings = get_settings()
+    init_db()
+    result = calculate_tension_index(settings=settings, persist=not args.no_save)
+    if not args.no_save:
+        prune_old_snapshots(settings.history.keep_days)
+        if settings.data.use_bar_store:
+            prune_bar_store(settings)
+    if args.json:
+        print(json.dumps(result, default=str))
+    else:
+        print(_summary(result))
+    return 0
+
+
+def _daemon(args: argparse.Namespace) -> int:
+    from meti.data.history import init_db
+    from meti.scheduler import SnapshotScheduler
+
+    init_db()
+    scheduler = SnapshotScheduler(
+        interval_seconds=args.interval,
+        snapshot_interval_seconds=args.snapshot_interval or args.interval,
+    )
+    scheduler.add_listener(lambda result: logger.info("%s", _summary(result)))
+    scheduler.start()
+    logger.info(
+        "Computing every %.0fs, saving snapshots every %.0fs",
+        scheduler.interval,
+        scheduler.snapshot_interval,
+    )
+    try:
+        while scheduler.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        scheduler.stop(timeout=5)
+    return 0
+
+
+def _export(args: argparse.Namespace) -> int:
+    from meti.data.history import get_history, get_recent_snapshots
+
+    if args.rollups:
+        rows = get_history(days=args.days)
+    else:
+        rows = get_recent_snapshots(days=args.days, limit=args.limit, with_assets=args.assets)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    try:
+        if args.format == "json":
+            json.dump(rows, out)
+            out.write("\n")
+        elif rows:
+            writer = csv.DictWriter(out, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if args.output:
+        logger.info("Exported %d rows to %s", len(rows), args.output)
+    return 0
+
+
+# Subcommands handing their arguments to another module's main()
+_FORWARDS = {"bench": "meti.bench", "profile": "meti.profiling"}
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in _FORWARDS:
+        return importlib.import_module(_FORWARDS[argv[0]]).main(argv[1:])
+
+    parser = argparse.ArgumentParser(prog="meti", description="Middle-East Tension Indicator")
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    compute = sub.add_parser("compute", help="compute the tension index and store a snapshot")
+    compute.add_argument(
+        "--once",
+        action="store_true",
+        help="compute a single result and exit (the default; for cron lines)",
+    )
+    compute.add_argument("--no-save", action="store_true", help="don't store a snapshot")
+    compute.add_argument("--json", action="store_true", help="print the full result as JSON")
+    compute.set_defaults(handler=_compute)
+
+    daemon = sub.add_parser("daemon", help="compute and store snapshots until interrupted")
+    daemon.add_argument(
+        "--interval",
+        type=float,
+        default=None,
+        help="seconds between computations (default: app.refresh_seconds)",
+    )
+    daemon.add_argument(
+        "--snapshot-interval",
+        type=float,
+        default=None,
+        help="seconds between stored snapshots (default: --interval, "
+        "else history.snapshot_interval_minutes)",
+    )
+    daemon.set_defaults(handler=_daemon)
+
+    export = sub.add_parser("export", help="write stored history as CSV or JSON")
+    export.add_argument("--days", type=int, default=30)
+    export.add_argument("--format", choices=("csv", "json"), default="csv")
+    export.add_argument("--output", "-o", help="file to write (default: stdout)")
+    export.add_argument("--limit", type=int, default=1_000_000, help="max raw snapshots")
+    export.add_argument("--assets", action="store_true", help="include per-asset changes")
+    export.add_argument(
+        "--rollups",
+        action="store_true",
+        help="export what the history chart shows (rollups for long ranges)",
+    )
+    export.set_defaults(handler=_export)
+
+    for name, target in _FORWARDS.items():
+        # Listed for --help only; main() forwards these before parsing
+        sub.add_parser(name, help=f"same as python -m {target}")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -50,6 +50,38 @@ class HistoryConfig(BaseModel):
     db_path: str = "data/meti_history.db"
     snapshot_interval_minutes: int = 15
     keep_days: int = 90
+    target_points: int = 500  # max points per history chart before rollups kick in
+    webgl_threshold: int = 1000  # history chart draws with WebGL (Scattergl) above this many points
+    pool_size: int = 4  # pooled SQLite connections shared by all threads
+
+
+class DataConfig(BaseModel):
+    fetch_mode: str = "batch"  # "batch" = one download per timeframe, "resample" = derive from finest bars
+    max_workers: int = 4
+    fetch_timeout_seconds: float = 10.0
+    refresh_deadline_seconds: float = 20.0
+    use_bar_store: bool = True
+    bar_store_file: str = "bars.db"  # created beside history.db_path
+    provider: str = "yfinance"  # "yfinance", "replay" or "synthetic"
+    replay_dir: str = "data/replay"  # <ticker>_<interval>.csv / .parquet files
+    replay_as_of: str | None = None  # replay "now"; defaults to each file's last bar
+    synthetic_seed: int = 42
+    synthetic_latency_seconds: float = 0.0
+    synthetic_error_rate: float = 0.0
+    synthetic_anchor: str | None = None  # fixed "now" for reproducible runs
+
+
+class MetricsConfig(BaseModel):
+    enabled: bool = True
+    path: str = "/metrics"  # Prometheus scrape endpoint beside the Gradio app
+
+
+class ProfilingConfig(BaseModel):
+    enabled: bool = False  # env METI_PROFILE=1 overrides
+    every_n: int = 0  # profile every Nth call; 0 = only on request (SIGUSR1)
+    memory: bool = True  # also capture tracemalloc snapshots
+    keep: int = 20  # captures kept per function
+    directory: str = "profiles"  # created beside history.db_path
 
 
 class AppConfig(BaseModel):
@@ -58,7 +90,15 @@ class AppConfig(BaseModel):
     version: str = "1.0.0"
     description: str = ""
     refresh_seconds: int = 180
+    push_seconds: float = 5.0  # how often open pages check for a newer shared result
     cache_ttl_seconds: int = 120
+    cache_max_entries: int = 256
+    coalesce_seconds: float = 5.0
+    refresh_min_seconds: float | None = None  # min gap between forced refreshes; None = cache_ttl_seconds
+    warmup: bool = True  # compute and render once at startup, gate /readyz on it
+    warmup_retry_seconds: float = 5.0  # first retry delay if the warm-up fetch fails
+    server_name: str = "0.0.0.0"  # bind address; GRADIO_SERVER_NAME overrides
+    server_port: int = 7860  # GRADIO_SERVER_PORT overrides
 
 
 class Settings(BaseModel):
@@ -68,6 +108,9 @@ class Settings(BaseModel):
     normalization: NormalizationConfig = Field(default_factory=NormalizationConfig)
     gauge: GaugeConfig = Field(default_factory=GaugeConfig)
     history: HistoryConfig = Field(default_factory=HistoryConfig)
+    data: DataConfig = Field(default_factory=DataConfig)
+    metrics: MetricsConfig = Field(default_factory=MetricsConfig)
+    profiling: ProfilingConfig = Field(default_factory=ProfilingConfig)
 
     @property
     def asset_weights(self) -> dict[str, float]:
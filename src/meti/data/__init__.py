@@ -1,5 +1,39 @@
-from .providers import get_all_asset_data, fetch_price_change
-from .history import init_db, save_snapshot, get_recent_snapshots
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+# Exports are imported on first access: providers pull in pandas and numpy
+_EXPORTS = {
+    "get_all_asset_data": ".providers",
+    "fetch_price_change": ".providers",
+    "MarketDataProvider": ".backends",
+    "YFinanceProvider": ".backends",
+    "ReplayProvider": ".backends",
+    "SyntheticProvider": ".backends",
+    "get_provider": ".backends",
+    "BarStore": ".bars",
+    "get_bar_store": ".bars",
+    "init_db": ".history",
+    "save_snapshot": ".history",
+    "get_recent_snapshots": ".history",
+    "get_history": ".history",
+}
+
+if TYPE_CHECKING:
+    from .providers import get_all_asset_data, fetch_price_change
+    from .backends import (
+        MarketDataProvider,
+        YFinanceProvider,
+        ReplayProvider,
+        SyntheticProvider,
+        get_provider,
+    )
+    from .bars import BarStore, get_bar_store
+    from .history import init_db, save_snapshot, get_recent_snapshots, get_history
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
 
 __all__ = [
     "get_all_asset_data",
@@ -7,4 +41,12 @@ __all__ = [
     "init_db",
     "save_snapshot",
     "get_recent_snapshots",
+    "get_history",
+    "BarStore",
+    "get_bar_store",
+    "MarketDataProvider",
+    "YFinanceProvider",
+    "ReplayProvider",
+    "SyntheticProvider",
+    "get_provider",
 ]
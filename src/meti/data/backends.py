@@ -0,0 +1,400 @@
+"""Market data backends for METI.
+
+Every backend implements `MarketDataProvider.download`, returning OHLCV
+frames per ticker. The provider layer (`meti.data.providers`) only talks
+to this interface, so the app, benchmarks and tests can run against
+Yahoo Finance, recorded files or a seeded synthetic market alike.
+"""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Protocol
+
+import numpy as np
+import pandas as pd
+
+from meti.config import Settings, get_settings
+
+# pandas offsets for the yfinance intervals we can derive locally
+_INTERVAL_FREQ = {
+    "1m": "1min",
+    "2m": "2min",
+    "5m": "5min",
+    "15m": "15min",
+    "30m": "30min",
+    "60m": "60min",
+    "90m": "90min",
+    "1h": "60min",
+    "1d": "1D",
+}
+
+_DAY_MINUTES = 1440
+
+# Approximate calendar span of yfinance periods, used only for ordering
+_PERIOD_DAYS = {
+    "1d": 1,
+    "5d": 5,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653,
+}
+
+
+def interval_timedelta(interval: str) -> pd.Timedelta:
+    """Bar length of a yfinance interval string such as "15m" or "1d"."""
+    return pd.Timedelta(_INTERVAL_FREQ[interval])
+
+
+def period_timedelta(period: str) -> pd.Timedelta:
+    """Approximate calendar length of a yfinance period string."""
+    return pd.Timedelta(days=_PERIOD_DAYS.get(period, 31))
+
+
+class MarketDataProvider(Protocol):
+    """Source of OHLCV bars."""
+
+    name: str
+
+    def download(
+        self,
+        tickers: list[str],
+        interval: str,
+        period: str | None = None,
+        start: pd.Timestamp | None = None,
+        end: pd.Timestamp | None = None,
+        timeout: float = 10,
+    ) -> dict[str, pd.DataFrame]:
+        """
+        Return OHLCV frames (Open/High/Low/Close/Volume columns, tz-aware
+        index of bar start times) for either the trailing `period` or the
+        `start`..`end` window. Tickers without data are absent.
+        """
+        ...
+
+    def now(self) -> pd.Timestamp:
+        """
+        The provider's current time (UTC): the wall clock for live data,
+        the replay or anchor time otherwise. Freshness checks against
+        stored bars must use this rather than the wall clock.
+        """
+        ...
+
+
+def _extract_ticker_bars(data: pd.DataFrame, tickers: list[str]) -> dict[str, pd.DataFrame]:
+    """Slice per-ticker OHLCV frames out of a multi-ticker yfinance download."""
+    if data is None or data.empty:
+        return {}
+
+    if not isinstance(data.columns, pd.MultiIndex):
+        if len(tickers) == 1 and "Close" in data.columns:
+            return {tickers[0]: data.dropna(subset=["Close"])}
+        return {}
+
+    # Put the price field on level 0 whatever group_by was used
+    if "Close" not in data.columns.get_level_values(0):
+        data = data.swaplevel(axis=1)
+
+    result: dict[str, pd.DataFrame] = {}
+    for ticker in tickers:
+        try:
+            frame = data.xs(ticker, axis=1, level=1, drop_level=True)
+        except KeyError:
+            continue
+        frame = frame.dropna(subset=["Close"])
+        if not frame.empty:
+            result[ticker] = frame
+    return result
+
+
+@dataclass(frozen=True)
+class YFinanceProvider:
+    """Live Yahoo Finance data via yfinance."""
+
+    name: str = "yfinance"
+
+    def download(
+        self,
+        tickers: list[str],
+        interval: str,
+        period: str | None = None,
+        start: pd.Timestamp | None = None,
+        end: pd.Timestamp | None = None,
+        timeout: float = 10,
+    ) -> dict[str, pd.DataFrame]:
+        import yfinance as yf
+
+        if start is not None:
+            window = {"start": start} if end is None else {"start": start, "end": end}
+        else:
+            window = {"period": period}
+        data = yf.download(
+            list(tickers),
+            interval=interval,
+            auto_adjust=False,
+            progress=False,
+            threads=False,
+            group_by="column",
+            timeout=timeout,
+            **window,
+        )
+        return _extract_ticker_bars(data, list(tickers))
+
+    def now(self) -> pd.Timestamp:
+        return pd.Timestamp.now(tz="UTC")
+
+
+def _utc(ts: pd.Timestamp | str) -> pd.Timestamp:
+    ts = pd.Timestamp(ts)
+    return ts.tz_localize("UTC") if ts.tz is None else ts.tz_convert("UTC")
+
+
+def _window(
+    index: pd.DatetimeIndex,
+    as_of: pd.Timestamp,
+    period: str | None,
+    start: pd.Timestamp | None,
+    end: pd.Timestamp | None,
+) -> np.ndarray:
+    """Boolean mask selecting a yfinance-style window of bar start times."""
+    if start is None:
+        return (index > as_of - period_timedelta(period or "1mo")) & (index <= as_of)
+    mask = (index >= _utc(start)) & (index <= as_of)
+    if end is not None:
+        mask &= index < _utc(end)
+    return mask
+
+
+@dataclass(frozen=True)
+class ReplayProvider:
+    """
+    Recorded bars from `<directory>/<ticker>_<interval>.csv` or `.parquet`.
+
+    Files need a timestamp first column (or index) and at least a Close
+    column. Trailing periods are measured back from `as_of`, which defaults
+    to the newest bar in each file, so replays are fully reproducible.
+    """
+
+    directory: str = "data/replay"
+    as_of: str | None = None
+    name: str = "replay"
+
+    def __post_init__(self) -> None:
+        # (file signature, newest bar) for now(); not part of eq/hash/repr
+        object.__setattr__(self, "_now_cache", ((), None))
+        object.__setattr__(self, "_now_lock", threading.Lock())
+
+    def _load(self, ticker: str, interval: str) -> pd.DataFrame | None:
+        base = Path(self.directory) / f"{ticker}_{interval}"
+        parquet = base.with_suffix(".parquet")
+        csv = base.with_suffix(".csv")
+        if parquet.exists():
+            frame = pd.read_parquet(parquet)
+        elif csv.exists():
+            frame = pd.read_csv(csv, index_col=0)
+        else:
+            return None
+        frame.index = pd.to_datetime(frame.index, utc=True)
+        return frame.sort_index()
+
+    def download(
+        self,
+        tickers: list[str],
+        interval: str,
+        period: str | None = None,
+        start: pd.Timestamp | None = None,
+        end: pd.Timestamp | None = None,
+        timeout: float = 10,
+    ) -> dict[str, pd.DataFrame]:
+        result: dict[str, pd.DataFrame] = {}
+        for ticker in tickers:
+            frame = self._load(ticker, interval)
+            if frame is None or frame.empty:
+                continue
+            as_of = _utc(self.as_of) if self.as_of else frame.index[-1]
+            frame = frame[_window(frame.index, as_of, period, start, end)]
+            frame = frame.dropna(subset=["Close"])
+            if not frame.empty:
+                result[ticker] = frame
+        return result
+
+    def now(self) -> pd.Timestamp:
+        if self.as_of:
+            return _utc(self.as_of)
+        # Without `as_of` each file ends at its newest bar; take the latest.
+        # Files are only re-read when one is added, removed or modified.
+        paths = sorted(
+            p for p in Path(self.directory).glob("*_*.*") if p.suffix in (".csv", ".parquet")
+        )
+        signature = tuple((p.name, p.stat().st_mtime_ns) for p in paths)
+        with self._now_lock:
+            if self._now_cache[0] == signature:
+                return self._now_cache[1]
+        latest = None
+        for path in paths:
+            ticker, _, interval = path.stem.rpartition("_")
+            frame = self._load(ticker, interval)
+            if frame is not None and not frame.empty:
+                latest = frame.index[-1] if latest is None else max(latest, frame.index[-1])
+        if latest is None:
+            return pd.Timestamp.now(tz="UTC")
+        with self._now_lock:
+            object.__setattr__(self, "_now_cache", (signature, latest))
+        return latest
+
+
+@dataclass(frozen=True)
+class SyntheticProvider:
+    """
+    Seeded random walk with optional latency and error injection.
+
+    Each ticker follows its own 1-minute path on the absolute UTC minute
+    grid, observed up to `anchor` (the current minute if unset); coarser
+    intervals are aggregated from it, so every interval is consistent. The
+    price at a given minute depends only on `seed`, the ticker and that
+    minute, so results are reproducible and bars downloaded earlier (e.g.
+    into the bar store) stay valid as the anchor moves. Each download
+    sleeps `latency` seconds (± `jitter`) and fails with probability
+    `error_rate`.
+    """
+
+    seed: int = 42
+    volatility: float = 0.0008  # per-minute log-return standard deviation
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    anchor: str | None = None
+    name: str = "synthetic"
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "_rng", random.Random(self.seed))
+        object.__setattr__(self, "_rng_lock", threading.Lock())
+
+    def _anchor(self) -> pd.Timestamp:
+        if self.anchor:
+            return _utc(self.anchor)
+        return pd.Timestamp.now(tz="UTC").floor("min")
+
+    def now(self) -> pd.Timestamp:
+        return self._anchor()
+
+    def _day_rng(self, key: int, day: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, key, day])
+
+    def _path(self, ticker: str, anchor: pd.Timestamp, minutes: int) -> pd.Series:
+        """
+        Minute closes for the `minutes` minutes ending at `anchor`.
+
+        Every UTC day has a log-price level drawn from (seed, ticker, day);
+        within a day the path is a Brownian bridge from that day's level to
+        the next one's, so no minute depends on where the window starts.
+        """
+        key = zlib.crc32(ticker.encode())
+        base = np.log(20.0 + np.random.default_rng([self.seed, key]).random() * 180.0)
+        # Spread of the daily levels: consecutive days differ by about one
+        # day of per-minute steps
+        spread = self.volatility * np.sqrt(_DAY_MINUTES / 2)
+
+        last = int(anchor.timestamp() // 60)
+        first = last - minutes + 1
+        first_day, last_day = first // _DAY_MINUTES, last // _DAY_MINUTES
+        fraction = np.arange(_DAY_MINUTES) / _DAY_MINUTES
+        level = self._day_rng(key, first_day).standard_normal() * spread
+        segments = []
+        for day in range(first_day, last_day + 1):
+            rng = self._day_rng(key, day)
+            rng.standard_normal()  # this day's level, drawn above
+            walk = np.concatenate(([0.0], np.cumsum(rng.standard_normal(_DAY_MINUTES))))
+            bridge = (walk[:-1] - fraction * walk[-1]) * self.volatility
+            next_level = self._day_rng(key, day + 1).standard_normal() * spread
+            segments.append(base + level + (next_level - level) * fraction + bridge)
+            level = next_level
+        log_prices = np.concatenate(segments)[first - first_day * _DAY_MINUTES :][:minutes]
+        index = pd.date_range(end=anchor.floor("min"), periods=minutes, freq="1min")
+        return pd.Series(np.exp(log_prices), index=index)
+
+    def download(
+        self,
+        tickers: list[str],
+        interval: str,
+        period: str | None = None,
+        start: pd.Timestamp | None = None,
+        end: pd.Timestamp | None = None,
+        timeout: float = 10,
+    ) -> dict[str, pd.DataFrame]:
+        with self._rng_lock:
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+            fail = self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(min(delay, timeout))
+            if delay > timeout:
+                raise TimeoutError(f"synthetic download exceeded {timeout}s")
+        if fail:
+            raise ConnectionError("synthetic provider injected failure")
+
+        anchor = self._anchor()
+        if start is not None:
+            first = _utc(start)
+        else:
+            first = anchor - period_timedelta(period or "1mo")
+        minutes = max(2, int((anchor - first) / pd.Timedelta("1min")) + 1)
+
+        result: dict[str, pd.DataFrame] = {}
+        for ticker in tickers:
+            path = self._path(ticker, anchor, minutes)
+            bars = path.resample(_INTERVAL_FREQ[interval], label="left", closed="left").ohlc()
+            bars.columns = ["Open", "High", "Low", "Close"]
+            bars["Volume"] = 0.0
+            bars = bars[_window(bars.index, anchor, period, start, end)].dropna(subset=["Close"])
+            if not bars.empty:
+                result[ticker] = bars
+        return result
+
+
+_providers: dict[tuple, MarketDataProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(settings: Settings | None = None) -> MarketDataProvider:
+    """Return the backend selected by `data.provider` (one per configuration)."""
+    settings = settings or get_settings()
+    cfg = settings.data
+    if cfg.provider == "yfinance":
+        key: tuple = ("yfinance",)
+        factory = YFinanceProvider
+    elif cfg.provider == "replay":
+        key = ("replay", cfg.replay_dir, cfg.replay_as_of)
+        factory = partial(ReplayProvider, directory=cfg.replay_dir, as_of=cfg.replay_as_of)
+    elif cfg.provider == "synthetic":
+        key = (
+            "synthetic",
+            cfg.synthetic_seed,
+            cfg.synthetic_latency_seconds,
+            cfg.synthetic_error_rate,
+            cfg.synthetic_anchor,
+        )
+        factory = partial(
+            SyntheticProvider,
+            seed=cfg.synthetic_seed,
+            latency=cfg.synthetic_latency_seconds,
+            error_rate=cfg.synthetic_error_rate,
+            anchor=cfg.synthetic_anchor,
+        )
+    else:
+        raise ValueError(f"Unknown data provider: {cfg.provider!r}")
+
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = _providers[key] = factory()
+        return provider
@@ -0,0 +1,232 @@
+"""Persistent OHLCV bar store for METI.
+
+Bars live in a SQLite file next to the history database, keyed by
+(ticker, interval, bar start). Providers append only bars newer than the
+last stored timestamp and read their lookback windows back from here.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pandas as pd
+
+from meti.config import Settings, get_settings
+
+if TYPE_CHECKING:
+    from meti.data.backends import MarketDataProvider
+
+_BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _to_epoch_ms(ts: pd.Timestamp) -> int:
+    return int(pd.Timestamp(ts).tz_convert("UTC").value // 1_000_000)
+
+
+class BarStore:
+    """SQLite-backed OHLCV store, one row per (ticker, interval, ts)."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+
+    def _init_db(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS bars (
+                    ticker TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    ts INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL NOT NULL,
+                    volume REAL,
+                    PRIMARY KEY (ticker, interval, ts)
+                ) WITHOUT ROWID
+                """
+            )
+            # Exchange timezone per series so reads come back as downloaded
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS series (
+                    ticker TEXT NOT NULL,
+                    interval TEXT NOT NULL,
+                    tz TEXT,
+                    covered_from INTEGER,
+                    PRIMARY KEY (ticker, interval)
+                )
+                """
+            )
+
+    def last_timestamp(self, ticker: str, interval: str) -> pd.Timestamp | None:
+        """Start time of the newest stored bar, or None if the series is empty."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT MAX(ts) FROM bars WHERE ticker = ? AND interval = ?",
+                (ticker, interval),
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return pd.Timestamp(row[0], unit="ms", tz="UTC")
+
+    def covered_from(self, ticker: str, interval: str) -> pd.Timestamp | None:
+        """Earliest time a full download of this series has covered, if any."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT covered_from FROM series WHERE ticker = ? AND interval = ?",
+                (ticker, interval),
+            ).fetchone()
+        if row is None or row[0] is None:
+            return None
+        return pd.Timestamp(row[0], unit="ms", tz="UTC")
+
+    def mark_covered(self, ticker: str, interval: str, since: pd.Timestamp) -> None:
+        """Record that stored bars for this series are complete from `since` on."""
+        since_ms = _to_epoch_ms(since)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT INTO series (ticker, interval, covered_from) VALUES (?, ?, ?)
+                ON CONFLICT (ticker, interval) DO UPDATE SET covered_from =
+                    MIN(COALESCE(covered_from, excluded.covered_from), excluded.covered_from)
+                """,
+                (ticker, interval, since_ms),
+            )
+
+    def append(self, ticker: str, interval: str, bars: pd.DataFrame) -> int:
+        """
+        Upsert OHLCV bars. Returns the number of rows written.
+
+        Existing bars with the same start time are replaced, so re-fetching
+        the last (still forming) bar updates it in place.
+        """
+        bars = bars.dropna(subset=["Close"])
+        if bars.empty:
+            return 0
+
+        index = pd.DatetimeIndex(bars.index)
+        tz = str(index.tz) if index.tz is not None else None
+        if index.tz is None:
+            index = index.tz_localize("UTC")
+        epoch_ms = index.tz_convert("UTC").as_unit("ms").asi8
+
+        frame = bars.reindex(columns=_BAR_COLUMNS)
+        rows = [
+            (ticker, interval, int(ts), *(None if pd.isna(v) else float(v) for v in values))
+            for ts, values in zip(epoch_ms, frame.itertuples(index=False, name=None))
+        ]
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                """
+                INSERT OR REPLACE INTO bars
+                (ticker, interval, ts, open, high, low, close, volume)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows,
+            )
+            conn.execute(
+                """
+                INSERT INTO series (ticker, interval, tz) VALUES (?, ?, ?)
+                ON CONFLICT (ticker, interval) DO UPDATE SET tz = excluded.tz
+                """,
+                (ticker, interval, tz),
+            )
+        return len(rows)
+
+    def load_closes(
+        self,
+        ticker: str,
+        interval: str,
+        since: pd.Timestamp | None = None,
+        until: pd.Timestamp | None = None,
+    ) -> pd.Series:
+        """
+        Stored Close series in ascending time order, optionally limited to
+        bars starting from `since` and no later than `until`.
+        """
+        since_ms = 0 if since is None else _to_epoch_ms(since)
+        until_ms = 2**62 if until is None else _to_epoch_ms(until)
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT ts, close FROM bars
+                WHERE ticker = ? AND interval = ? AND ts >= ? AND ts <= ?
+                ORDER BY ts ASC
+                """,
+                (ticker, interval, since_ms, until_ms),
+            ).fetchall()
+            tz_row = conn.execute(
+                "SELECT tz FROM series WHERE ticker = ? AND interval = ?",
+                (ticker, interval),
+            ).fetchone()
+
+        index = pd.to_datetime([r[0] for r in rows], unit="ms", utc=True)
+        if tz_row is not None and tz_row[0]:
+            index = index.tz_convert(tz_row[0])
+        return pd.Series([r[1] for r in rows], index=index, name=ticker, dtype="float64")
+
+    def prune(self, older_than: pd.Timestamp) -> int:
+        """Delete bars that started before `older_than`. Returns deleted rows."""
+        cutoff = _to_epoch_ms(older_than)
+        with closing(self._connect()) as conn, conn:
+            cur = conn.execute("DELETE FROM bars WHERE ts < ?", (cutoff,))
+            # Series stay complete from the cutoff on, not from before it
+            conn.execute(
+                "UPDATE series SET covered_from = ? WHERE covered_from < ?",
+                (cutoff, cutoff),
+            )
+            return cur.rowcount
+
+
+_stores: dict[Path, BarStore] = {}
+
+
+def get_bar_store(settings: Settings | None = None, namespace: str = "yfinance") -> BarStore:
+    """
+    Return the process-wide bar store living beside the history DB.
+
+    Providers other than Yahoo Finance get their own file (e.g.
+    bars-synthetic.db) so replayed or simulated bars never mix with real ones.
+    """
+    settings = settings or get_settings()
+    path = Path(settings.history.db_path).parent / settings.data.bar_store_file
+    if namespace != "yfinance":
+        path = path.with_name(f"{path.stem}-{namespace}{path.suffix}")
+    store = _stores.get(path)
+    if store is None:
+        store = _stores.setdefault(path, BarStore(path))
+    return store
+
+
+def prune_bar_store(
+    settings: Settings | None = None,
+    provider: MarketDataProvider | None = None,
+) -> int:
+    """
+    Delete bars of `provider`'s store (default: the configured backend)
+    older than anything still needed: the longest timeframe period or the
+    history window (`history.keep_days`), whichever reaches further back,
+    measured from the provider's clock. Returns deleted rows.
+    """
+    from meti.data.backends import get_provider, period_timedelta
+
+    settings = settings or get_settings()
+    provider = provider or get_provider(settings)
+    keep = max(
+        [pd.Timedelta(days=settings.history.keep_days)]
+        + [period_timedelta(tf.period) for tf in settings.timeframes.values()]
+    )
+    # A few spare days, as full downloads reach back over weekends
+    older_than = provider.now() - keep - pd.Timedelta(days=4)
+    return get_bar_store(settings, provider.name).prune(older_than)
@@ -2,61 +2,249 @@
 
 from __future__ import annotations
 
+import copy
+import threading
 import time
+from collections import OrderedDict
 from functools import wraps
 from typing import Any, Callable
 
+_MISSING = object()
+
 
 class TTLCache:
-    """Very small thread-unsafe TTL cache for single-process use."""
+    """Thread-safe LRU cache with per-entry TTLs and hit/miss counters."""
 
-    def __init__(self, ttl_seconds: int = 120):
+    def __init__(self, ttl_seconds: float = 120, maxsize: int = 256):
         self.ttl = ttl_seconds
-        self._store: dict[str, tuple[float, Any]] = {}
+        self.maxsize = maxsize
+        self._store: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._store.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if now >= expires_at:
+                del self._store[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._store.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        now = time.monotonic()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._store[key] = (expires_at, value)
+            self._store.move_to_end(key)
+            if len(self._store) > self.maxsize:
+                # Drop expired entries first, then least recently used
+                self._purge_expired(now)
+                while len(self._store) > self.maxsize:
+                    self._store.popitem(last=False)
+                    self.evictions += 1
+
+    def _purge_expired(self, now: float) -> int:
+        expired = [k for k, (exp, _) in self._store.items() if now >= exp]
+        for k in expired:
+            del self._store[k]
+        self.expirations += len(expired)
+        return len(expired)
+
+    def expire(self) -> int:
+        """Remove every expired entry. Returns how many were removed."""
+        with self._lock:
+            return self._purge_expired(time.monotonic())
 
-    def get(self, key: str) -> Any | None:
-        item = self._store.get(key)
-        if item is None:
-            return None
-        ts, value = item
-        if time.time() - ts > self.ttl:
-            del self._store[key]
-            return None
-        return value
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
 
-    def set(self, key: str, value: Any) -> None:
-        self._store[key] = (time.time(), value)
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._store),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
 
-    def clear(self) -> None:
-        self._store.clear()
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._store)
 
 
-# Global cache instance (one per process)
-_default_cache = TTLCache(ttl_seconds=120)
+# Global cache instance (one per process), sized from settings on first use
+_default_cache: TTLCache | None = None
+_default_lock = threading.Lock()
 
 
-def cached(ttl: int | None = None) -> Callable:
-    """Decorator for simple function result caching."""
+def get_cache() -> TTLCache:
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            from meti.config import get_settings
+
+            app = get_settings().app
+            _default_cache = TTLCache(
+                ttl_seconds=app.cache_ttl_seconds,
+                maxsize=app.cache_max_entries,
+            )
+        return _default_cache
+
+
+def cached(
+    ttl: float | None = None,
+    cache_if: Callable[[Any], bool] | None = None,
+    copy_result: bool = False,
+) -> Callable:
+    """
+    Decorator for simple function result caching.
+
+    `ttl` overrides the cache's default lifetime (app.cache_ttl_seconds).
+    `cache_if` can veto storing a result, e.g. a partial fetch.
+    `copy_result` hands each caller a deep copy, for mutable results that
+    callers might change in place.
+
+    The wrapped function gets a `fresh(*args, **kwargs)` attribute that
+    skips the lookup, recomputes and replaces the cached entry.
+    """
 
     def decorator(fn: Callable) -> Callable:
-        @wraps(fn)
-        def wrapper(*args, **kwargs):
-            key = f"{fn.__name__}:{args}:{sorted(kwargs.items())}"
-            cache = _default_cache
-            if ttl is not None:
-                # temporary override not fully supported; use default for simplicity
-                pass
-            hit = cache.get(key)
-            if hit is not None:
-                return hit
+        def _key(args: tuple, kwargs: dict) -> str:
+            return f"{fn.__module__}.{fn.__qualname__}:{args}:{sorted(kwargs.items())}"
+
+        def _out(value: Any) -> Any:
+            return copy.deepcopy(value) if copy_result else value
+
+        def _compute(key: str, args: tuple, kwargs: dict) -> Any:
             result = fn(*args, **kwargs)
-            cache.set(key, result)
+            if cache_if is None or cache_if(result):
+                get_cache().set(key, _out(result), ttl=ttl)
             return result
 
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = _key(args, kwargs)
+            hit = get_cache().get(key, _MISSING)
+            if hit is not _MISSING:
+                return _out(hit)
+            return _compute(key, args, kwargs)
+
+        def fresh(*args, **kwargs):
+            return _compute(_key(args, kwargs), args, kwargs)
+
+        wrapper.fresh = fresh
         return wrapper
 
     return decorator
 
 
-def get_cache() -> TTLCache:
-    return _default_cache
+class _Call:
+    __slots__ = ("done", "result", "error", "expires_at")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException | None = None
+        self.expires_at = 0.0
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    Callers arriving while a call is in flight wait for it and get its
+    result (or exception). A successful result keeps being shared for
+    `window` seconds after it completes.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[str, _Call] = {}
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any], window: float = 0.0) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and (
+                not call.done.is_set() or time.monotonic() < call.expires_at
+            ):
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            if call.error is None and window > 0:
+                call.expires_at = time.monotonic() + window
+            else:
+                with self._lock:
+                    if self._calls.get(key) is call:
+                        del self._calls[key]
+            call.done.set()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"executions": self.executions, "coalesced": self.coalesced}
+
+
+_default_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    return _default_flight
+
+
+def single_flight(window: float | None = None) -> Callable:
+    """
+    Decorator sharing one in-flight execution between concurrent callers
+    with the same arguments.
+
+    `window` defaults to app.coalesce_seconds: callers arriving that soon
+    after a call finished reuse its result instead of starting a new one.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            key = f"{fn.__module__}.{fn.__qualname__}:{args}:{sorted(kwargs.items())}"
+            share_for = window
+            if share_for is None:
+                from meti.config import get_settings
+
+                share_for = get_settings().app.coalesce_seconds
+            return _default_flight.do(key, lambda: fn(*args, **kwargs), window=share_for)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,84 @@
+"""Price tick feeds for METI's streaming mode.
+
+A feed is any iterable of `Tick`s. Two are provided: a replay of a
+recorded CSV file and an in-process queue that stands in for a socket
+(a producer thread pushes ticks, the streaming index consumes them).
+"""
+
+from __future__ import annotations
+
+import csv
+import queue
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Protocol
+
+
+@dataclass(frozen=True)
+class Tick:
+    ticker: str
+    ts: float  # epoch seconds, UTC
+    price: float
+
+
+class TickFeed(Protocol):
+    def __iter__(self) -> Iterator[Tick]: ...
+
+
+class ReplayFeed:
+    """
+    Replay ticks from a CSV file with `ts,ticker,price` columns.
+
+    `ts` is epoch seconds or an ISO-8601 string. With `speed` > 0 the
+    original spacing is reproduced (2.0 = twice as fast); 0 replays as fast
+    as possible.
+    """
+
+    def __init__(self, path: str | Path, speed: float = 0.0):
+        self.path = Path(path)
+        self.speed = speed
+
+    @staticmethod
+    def _parse_ts(value: str) -> float:
+        try:
+            return float(value)
+        except ValueError:
+            from datetime import datetime, timezone
+
+            dt = datetime.fromisoformat(value)
+            if dt.tzinfo is None:
+                dt = dt.replace(tzinfo=timezone.utc)
+            return dt.timestamp()
+
+    def __iter__(self) -> Iterator[Tick]:
+        prev_ts: float | None = None
+        with open(self.path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                tick = Tick(row["ticker"], self._parse_ts(row["ts"]), float(row["price"]))
+                if self.speed > 0 and prev_ts is not None and tick.ts > prev_ts:
+                    time.sleep((tick.ts - prev_ts) / self.speed)
+                prev_ts = tick.ts
+                yield tick
+
+
+class QueueFeed:
+    """Thread-safe push feed; iteration ends once `close()` is called."""
+
+    _CLOSED = object()
+
+    def __init__(self, maxsize: int = 10_000):
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+
+    def put(self, tick: Tick) -> None:
+        self._queue.put(tick)
+
+    def close(self) -> None:
+        self._queue.put(self._CLOSED)
+
+    def __iter__(self) -> Iterator[Tick]:
+        while True:
+            item = self._queue.get()
+            if item is self._CLOSED:
+                return
+            yield item
@@ -2,52 +2,262 @@
 
 from __future__ import annotations
 
+import json
+import queue
 import sqlite3
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import AbstractContextManager, contextmanager
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any
 
 from meti.config import get_settings
+from meti.metrics import DB_SECONDS
+
+# Tuned for one writer (the scheduler) and many concurrent readers
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+)
+
+_INSERT_SNAPSHOT = """
+    INSERT INTO snapshots
+    (ts, ts_epoch, raw_index, tension_score,
+     oil_change, gold_change, btc_change, lmt_change, details)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+_schema_lock = threading.Lock()
+_schema_ready: set[Path] = set()
 
 
 def _get_db_path() -> Path:
     settings = get_settings()
-    path = Path(settings.history.db_path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    return path
+    return Path(settings.history.db_path)
+
+
+class _ConnectionPool:
+    """
+    Bounded pool of long-lived connections to one database, shared by all
+    threads. WAL lets the pooled connections read concurrently while one
+    of them writes; callers beyond `size` wait for a free connection.
+    """
+
+    def __init__(self, path: Path, size: int):
+        self.path = path
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
 
+    def _open(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), check_same_thread=False, cached_statements=64)
+        conn.row_factory = sqlite3.Row
+        for pragma in _PRAGMAS:
+            conn.execute(pragma)
+        if self.path not in _schema_ready:
+            _create_schema(conn, self.path)
+        return conn
 
-def _connect() -> sqlite3.Connection:
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._open()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+    def close(self) -> None:
+        """Close the idle connections."""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+_pools: dict[Path, _ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _connect() -> AbstractContextManager[sqlite3.Connection]:
+    """Check out a pooled connection to the history DB for a `with` block."""
     path = _get_db_path()
-    conn = sqlite3.connect(str(path), check_same_thread=False)
-    conn.row_factory = sqlite3.Row
-    return conn
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = _ConnectionPool(path, get_settings().history.pool_size)
+    return pool.connection()
 
 
-def init_db() -> None:
-    """Create tables if they do not exist."""
-    with _connect() as conn:
-        conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS snapshots (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ts TEXT NOT NULL,
-                raw_index REAL NOT NULL,
-                tension_score INTEGER NOT NULL,
-                oil_change REAL,
-                gold_change REAL,
-                btc_change REAL,
-                lmt_change REAL,
-                details TEXT
-            )
-            """
+def _migrate_create_snapshots(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS snapshots (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            raw_index REAL NOT NULL,
+            tension_score INTEGER NOT NULL,
+            oil_change REAL,
+            gold_change REAL,
+            btc_change REAL,
+            lmt_change REAL,
+            details TEXT
         )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_ts ON snapshots(ts)")
+
+
+def _migrate_epoch_timestamps(conn: sqlite3.Connection) -> None:
+    """Add integer epoch-ms timestamps with a covering index for range scans."""
+    conn.execute("ALTER TABLE snapshots ADD COLUMN ts_epoch INTEGER")
+    rows = conn.execute("SELECT id, ts FROM snapshots").fetchall()
+    conn.executemany(
+        "UPDATE snapshots SET ts_epoch = ? WHERE id = ?",
+        [(_to_epoch_ms(datetime.fromisoformat(r["ts"])), r["id"]) for r in rows],
+    )
+    conn.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_snapshots_epoch
+        ON snapshots(ts_epoch, tension_score, raw_index)
+        """
+    )
+    conn.execute("DROP INDEX IF EXISTS idx_snapshots_ts")
+
+
+# Rollup resolutions in seconds: 15 minutes, 1 hour, 1 day
+_ROLLUP_RESOLUTIONS = (900, 3600, 86400)
+
+_UPSERT_ROLLUP = """
+    INSERT INTO snapshot_rollups
+    (resolution, bucket, n, score_min, score_max, score_sum, raw_min, raw_max, raw_sum)
+    VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (resolution, bucket) DO UPDATE SET
+        n = n + 1,
+        score_min = MIN(score_min, excluded.score_min),
+        score_max = MAX(score_max, excluded.score_max),
+        score_sum = score_sum + excluded.score_sum,
+        raw_min = MIN(raw_min, excluded.raw_min),
+        raw_max = MAX(raw_max, excluded.raw_max),
+        raw_sum = raw_sum + excluded.raw_sum
+"""
+
+
+def _migrate_rollups(conn: sqlite3.Connection) -> None:
+    """Multi-resolution min/mean/max rollups, backfilled from snapshots."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS snapshot_rollups (
+            resolution INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            n INTEGER NOT NULL,
+            score_min REAL NOT NULL,
+            score_max REAL NOT NULL,
+            score_sum REAL NOT NULL,
+            raw_min REAL NOT NULL,
+            raw_max REAL NOT NULL,
+            raw_sum REAL NOT NULL,
+            PRIMARY KEY (resolution, bucket)
+        ) WITHOUT ROWID
+        """
+    )
+    for resolution in _ROLLUP_RESOLUTIONS:
+        width = resolution * 1000
         conn.execute(
-            "CREATE INDEX IF NOT EXISTS idx_snapshots_ts ON snapshots(ts)"
+            """
+            INSERT OR REPLACE INTO snapshot_rollups
+            SELECT ?, (ts_epoch / ?) * ?, COUNT(*),
+                   MIN(tension_score), MAX(tension_score), SUM(tension_score),
+                   MIN(raw_index), MAX(raw_index), SUM(raw_index)
+            FROM snapshots
+            GROUP BY ts_epoch / ?
+            """,
+            (resolution, width, width, width),
         )
-        conn.commit()
 
 
+def _migrate_history_revision(conn: sqlite3.Connection) -> None:
+    """Counter bumped by writes that change history before its newest row."""
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS history_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+    )
+    conn.execute("INSERT OR IGNORE INTO history_meta VALUES ('revision', 0)")
+
+
+# Applied in order; PRAGMA user_version records how many have run.
+# Append new migrations, never edit or reorder existing ones.
+_MIGRATIONS = (
+    _migrate_create_snapshots,
+    _migrate_epoch_timestamps,
+    _migrate_rollups,
+    _migrate_history_revision,
+)
+
+
+def _to_epoch_ms(dt: datetime) -> int:
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(round(dt.timestamp() * 1000))
+
+
+def _from_epoch_ms(ms: int) -> str:
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+
+def _create_schema(conn: sqlite3.Connection, path: Path) -> None:
+    """Bring the database up to the latest schema version."""
+    with _schema_lock:
+        if path in _schema_ready:
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, migration in enumerate(_MIGRATIONS, start=1):
+                if number > version:
+                    migration(conn)
+            conn.execute(f"PRAGMA user_version = {len(_MIGRATIONS)}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        _schema_ready.add(path)
+
+
+def schema_version() -> int:
+    """Current schema version of the history DB."""
+    with _connect() as conn:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def init_db() -> None:
+    """Create tables if they do not exist (once per process and database)."""
+    with _connect():
+        pass
+
+
+def close_db() -> None:
+    """Close the pooled history connections and forget the pools."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+# Per-asset change columns and the tickers stored in them
+_ASSET_COLUMNS = ("oil_change", "gold_change", "btc_change", "lmt_change")
+_ASSET_COLUMN_TICKERS = ("CL=F", "GC=F", "BTC-USD", "LMT")
+
+
+@DB_SECONDS.timed(op="save_snapshot")
 def save_snapshot(
     raw_index: float,
     tension_score: int,
@@ -55,58 +265,272 @@ def save_snapshot(
     details: str | None = None,
 ) -> None:
     """Persist one snapshot."""
-    init_db()
     asset_changes = asset_changes or {}
-    ts = datetime.now(timezone.utc).isoformat()
+    now = datetime.now(timezone.utc)
+    ts_epoch = _to_epoch_ms(now)
 
-    with _connect() as conn:
+    with _connect() as conn, conn:
         conn.execute(
-            """
-            INSERT INTO snapshots
-            (ts, raw_index, tension_score, oil_change, gold_change, btc_change, lmt_change, details)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+            _INSERT_SNAPSHOT,
             (
-                ts,
+                now.isoformat(),
+                ts_epoch,
                 raw_index,
                 tension_score,
-                asset_changes.get("CL=F"),
-                asset_changes.get("GC=F"),
-                asset_changes.get("BTC-USD"),
-                asset_changes.get("LMT"),
+                *(asset_changes.get(t) for t in _ASSET_COLUMN_TICKERS),
                 details,
             ),
         )
-        conn.commit()
+        conn.executemany(
+            _UPSERT_ROLLUP,
+            [
+                (
+                    resolution,
+                    ts_epoch - ts_epoch % (resolution * 1000),
+                    tension_score,
+                    tension_score,
+                    tension_score,
+                    raw_index,
+                    raw_index,
+                    raw_index,
+                )
+                for resolution in _ROLLUP_RESOLUTIONS
+            ],
+        )
+
+
+def _rebuild_rollups(conn: sqlite3.Connection, start_ms: int, end_ms: int) -> None:
+    """Recompute every rollup bucket overlapping [start_ms, end_ms]."""
+    for resolution in _ROLLUP_RESOLUTIONS:
+        width = resolution * 1000
+        lo = start_ms - start_ms % width
+        hi = end_ms - end_ms % width + width
+        conn.execute(
+            "DELETE FROM snapshot_rollups WHERE resolution = ? AND bucket >= ? AND bucket < ?",
+            (resolution, lo, hi),
+        )
+        conn.execute(
+            """
+            INSERT INTO snapshot_rollups
+            SELECT ?, (ts_epoch / ?) * ?, COUNT(*),
+                   MIN(tension_score), MAX(tension_score), SUM(tension_score),
+                   MIN(raw_index), MAX(raw_index), SUM(raw_index)
+            FROM snapshots
+            WHERE ts_epoch >= ? AND ts_epoch < ?
+            GROUP BY ts_epoch / ?
+            """,
+            (resolution, width, width, lo, hi, width),
+        )
+
+
+@DB_SECONDS.timed(op="save_snapshots")
+def save_snapshots(
+    ts_epoch: Sequence[int],
+    raw_index: Sequence[float],
+    tension_score: Sequence[int],
+    asset_changes: dict[str, Sequence[float]] | None = None,
+    details: str | None = None,
+) -> int:
+    """
+    Bulk-insert snapshots given as parallel arrays (e.g. from a backfill).
+
+    Rows in the same time window that were written with the same `source`
+    in their details (such as a previous backfill) are replaced, the
+    affected rollup buckets are recomputed and `history_revision()` is
+    bumped. Returns the number of rows.
+    """
+    if len(ts_epoch) == 0:
+        return 0
+    asset_changes = asset_changes or {}
+    none_column = [None] * len(ts_epoch)
+    columns = [
+        [None if v is None or v != v else float(v) for v in asset_changes[t]]
+        if t in asset_changes
+        else none_column
+        for t in _ASSET_COLUMN_TICKERS
+    ]
+    rows = [
+        (_from_epoch_ms(int(ts)), int(ts), float(raw), int(score), *changes, details)
+        for ts, raw, score, *changes in zip(ts_epoch, raw_index, tension_score, *columns)
+    ]
+    start_ms, end_ms = int(min(ts_epoch)), int(max(ts_epoch))
+    source = json.loads(details).get("source") if details else None
+
+    with _connect() as conn, conn:
+        if source is not None:
+            conn.execute(
+                """
+                DELETE FROM snapshots
+                WHERE ts_epoch >= ? AND ts_epoch <= ?
+                  AND json_extract(details, '$.source') = ?
+                """,
+                (start_ms, end_ms, source),
+            )
+        conn.executemany(_INSERT_SNAPSHOT, rows)
+        _rebuild_rollups(conn, start_ms, end_ms)
+        conn.execute("UPDATE history_meta SET value = value + 1 WHERE key = 'revision'")
+    return len(rows)
+
+
+def history_revision() -> int:
+    """
+    Revision of the stored history, bumped by every bulk write.
+
+    Single snapshots are appended at the current time; bulk writes (a
+    backfill, or one replacing an earlier one) can land anywhere, so
+    incrementally updated views must start over when this changes.
+    """
+    with _connect() as conn:
+        return conn.execute("SELECT value FROM history_meta WHERE key = 'revision'").fetchone()[0]
+
 
+@DB_SECONDS.timed(op="get_recent_snapshots")
+def get_recent_snapshots(
+    days: int = 30,
+    limit: int = 500,
+    with_assets: bool = False,
+    since_epoch: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Return the most recent `limit` snapshots, ordered by time ascending.
 
-def get_recent_snapshots(days: int = 30, limit: int = 500) -> list[dict[str, Any]]:
-    """Return recent snapshots ordered by time ascending."""
-    init_db()
-    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    By default only ts, ts_epoch, tension_score and raw_index are read,
+    which SQLite serves from the covering index alone. Pass `with_assets`
+    to also load the per-asset change columns, and `since_epoch` to only
+    read snapshots at or after that time.
+    """
+    cutoff = max(history_cutoff(days), since_epoch or 0)
+    columns = ("ts_epoch", "tension_score", "raw_index")
+    if with_assets:
+        columns += _ASSET_COLUMNS
 
     with _connect() as conn:
         rows = conn.execute(
-            """
-            SELECT ts, raw_index, tension_score, oil_change, gold_change, btc_change, lmt_change
+            f"""
+            SELECT {", ".join(columns)}
             FROM snapshots
-            WHERE ts >= ?
-            ORDER BY ts ASC
+            WHERE ts_epoch >= ?
+            ORDER BY ts_epoch DESC
             LIMIT ?
             """,
             (cutoff, limit),
         ).fetchall()
 
-    return [dict(r) for r in rows]
+    snapshots = []
+    for r in reversed(rows):
+        snap = dict(r)
+        snap["ts"] = _from_epoch_ms(snap["ts_epoch"])
+        snapshots.append(snap)
+    return snapshots
 
 
+@DB_SECONDS.timed(op="prune_old_snapshots")
 def prune_old_snapshots(keep_days: int | None = None) -> int:
     """Delete snapshots older than keep_days. Returns number of deleted rows."""
     settings = get_settings()
     days = keep_days if keep_days is not None else settings.history.keep_days
-    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    cutoff = _to_epoch_ms(datetime.now(timezone.utc) - timedelta(days=days))
+
+    with _connect() as conn, conn:
+        cur = conn.execute("DELETE FROM snapshots WHERE ts_epoch < ?", (cutoff,))
+        # Keep the bucket that straddles the cutoff
+        conn.execute(
+            "DELETE FROM snapshot_rollups WHERE bucket + resolution * 1000 <= ?",
+            (cutoff,),
+        )
+    return cur.rowcount
+
+
+def history_cutoff(days: int, resolution: int | None = None) -> int:
+    """
+    Epoch ms where a `days` history window starts, aligned down to the
+    bucket of `resolution` seconds for rollups.
+    """
+    cutoff = _to_epoch_ms(datetime.now(timezone.utc) - timedelta(days=days))
+    if resolution:
+        cutoff -= cutoff % (resolution * 1000)
+    return cutoff
+
+
+def _pick_resolution(conn: sqlite3.Connection, days: int, target: int) -> int | None:
+    """
+    None when the raw snapshots in the window fit `target`, else the finest
+    rollup whose stored buckets in the window do (the coarsest otherwise).
+
+    Counts what is stored rather than the window's width, so a sparse
+    history (two days of snapshots in a 30-day window) stays fine-grained.
+    """
+    raw_count = conn.execute(
+        "SELECT COUNT(*) FROM snapshots WHERE ts_epoch >= ?", (history_cutoff(days),)
+    ).fetchone()[0]
+    if raw_count <= target:
+        return None
+    for resolution in _ROLLUP_RESOLUTIONS[:-1]:
+        buckets = conn.execute(
+            "SELECT COUNT(*) FROM snapshot_rollups WHERE resolution = ? AND bucket >= ?",
+            (resolution, history_cutoff(days, resolution)),
+        ).fetchone()[0]
+        if buckets <= target:
+            return resolution
+    return _ROLLUP_RESOLUTIONS[-1]
+
+
+@DB_SECONDS.timed(op="get_history")
+def get_history(
+    days: int = 30,
+    target_points: int | None = None,
+    since_epoch: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Return history over the last `days` at a resolution fitting `target_points`.
+
+    Raw snapshots are returned when they fit; otherwise the finest rollup
+    (15 min, 1 h, 1 day) whose stored bucket count fits, each point carrying the
+    bucket mean as tension_score/raw_index plus score_min/score_max,
+    raw_min/raw_max and n. The payload stays bounded however wide the range.
 
+    With `since_epoch`, only the points from that time on are returned,
+    including the point at `since_epoch` itself (a rollup bucket keeps
+    filling after it was first read), for charts that update incrementally.
+    """
+    settings = get_settings()
+    target = target_points or settings.history.target_points
+
+    with _connect() as conn:
+        resolution = _pick_resolution(conn, days, target)
+
+    if resolution is None:
+        return get_recent_snapshots(days=days, limit=target, since_epoch=since_epoch)
+    start = history_cutoff(days, resolution)
+    if since_epoch is not None:
+        # The bucket containing `since_epoch` and everything after it
+        start = max(start, since_epoch - since_epoch % (resolution * 1000))
     with _connect() as conn:
-        cur = conn.execute("DELETE FROM snapshots WHERE ts < ?", (cutoff,))
-        conn.commit()
-        return cur.rowcount
+        rows = conn.execute(
+            """
+            SELECT bucket, n, score_min, score_max, score_sum, raw_min, raw_max, raw_sum
+            FROM snapshot_rollups
+            WHERE resolution = ? AND bucket >= ?
+            ORDER BY bucket DESC
+            LIMIT ?
+            """,
+            (resolution, start, target),
+        ).fetchall()
+
+    points = []
+    for r in reversed(rows):
+        points.append(
+            {
+                "ts": _from_epoch_ms(r["bucket"]),
+                "ts_epoch": r["bucket"],
+                "tension_score": r["score_sum"] / r["n"],
+                "raw_index": r["raw_sum"] / r["n"],
+                "score_min": r["score_min"],
+                "score_max": r["score_max"],
+                "raw_min": r["raw_min"],
+                "raw_max": r["raw_max"],
+                "n": r["n"],
+                "resolution": resolution,
+            }
+        )
+    return points
@@ -3,96 +3,462 @@
 from __future__ import annotations
 
 import logging
-from typing import Any
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable
 
 import pandas as pd
-import yfinance as yf
 
 from meti.config import Settings, get_settings
+from meti.data.backends import (
+    _PERIOD_DAYS,
+    MarketDataProvider,
+    get_provider,
+    interval_timedelta,
+)
+from meti.data.bars import BarStore, get_bar_store
+from meti.data.cache import cached
+from meti.metrics import FETCH_ERRORS, FETCH_MISSING, FETCH_SECONDS, counter
 
 logger = logging.getLogger(__name__)
 
+_INCOMPLETE_GROUPS = counter(
+    "meti_fetch_incomplete_total",
+    "Download groups that failed or missed the refresh deadline.",
+    ("period", "interval"),
+)
 
-def _extract_close_series(data: pd.DataFrame) -> pd.Series | None:
-    """Robustly extract a 1-D Close series from yfinance output."""
-    if data is None or data.empty:
-        return None
+def _price_change_from_closes(
+    closes: pd.Series | None,
+    lookback_bars: int,
+) -> tuple[float, float]:
+    """Percent change over the last `lookback_bars` bars of a Close series."""
+    if closes is None or len(closes) < 2:
+        return 0.0, 0.0
 
-    # Newer yfinance sometimes returns MultiIndex columns even for one ticker
-    if isinstance(data.columns, pd.MultiIndex):
-        # Try to pick the Close level
-        try:
-            if "Close" in data.columns.get_level_values(0):
-                closes = data["Close"]
-            else:
-                closes = data.xs("Close", axis=1, level=0, drop_level=True)
-            if isinstance(closes, pd.DataFrame):
-                closes = closes.iloc[:, 0]
-            return closes.dropna()
-        except Exception:
-            pass
+    # Use available bars if fewer than requested
+    bars = min(lookback_bars, len(closes) - 1)
+    if bars < 1:
+        return 0.0, float(closes.iloc[-1])
+
+    start_price = float(closes.iloc[-bars - 1])
+    end_price = float(closes.iloc[-1])
 
-    # Classic single-level columns
-    if "Close" in data.columns:
-        return data["Close"].dropna()
+    if start_price == 0:
+        return 0.0, end_price
 
-    # Last resort: first numeric column
-    numeric = data.select_dtypes(include="number")
-    if not numeric.empty:
-        return numeric.iloc[:, 0].dropna()
+    pct = ((end_price - start_price) / start_price) * 100.0
+    return pct, end_price
 
-    return None
 
+def _download(
+    provider: MarketDataProvider,
+    tickers: list[str],
+    interval: str,
+    timeout: float,
+    **window: Any,
+) -> dict[str, pd.DataFrame]:
+    """provider.download with timing, error and missing-ticker metrics."""
+    scope = "batch" if len(tickers) > 1 else "single"
+    try:
+        with FETCH_SECONDS.time(provider=provider.name, interval=interval, scope=scope):
+            bars = provider.download(tickers, interval, timeout=timeout, **window)
+    except Exception:
+        FETCH_ERRORS.inc(provider=provider.name, interval=interval)
+        raise
+    for ticker in tickers:
+        if ticker not in bars:
+            FETCH_MISSING.inc(ticker=ticker, interval=interval)
+    return bars
 
+
+@cached(cache_if=lambda r: r[1] > 0)
 def fetch_price_change(
     ticker: str,
     period: str,
     interval: str,
     lookback_bars: int,
+    timeout: float = 10,
+    store: BarStore | None = None,
+    provider: MarketDataProvider | None = None,
 ) -> tuple[float, float]:
     """
     Fetch percent change over the last `lookback_bars` bars.
 
+    `timeout` bounds the underlying HTTP request, in seconds. With a bar
+    `store`, only bars newer than the last stored one are downloaded and the
+    lookback window is read back from the store. `provider` defaults to the
+    configured backend.
+
     Returns
     -------
     (percent_change, current_price)
     """
+    provider = provider or get_provider()
+    if store is not None:
+        closes = _sync_group(store, [ticker], period, interval, timeout=timeout, provider=provider)
+        return _price_change_from_closes(closes.get(ticker), lookback_bars)
+
     try:
-        data = yf.download(
-            ticker,
-            period=period,
-            interval=interval,
-            auto_adjust=False,
-            progress=False,
-            threads=False,
-        )
-        closes = _extract_close_series(data)
-        if closes is None or len(closes) < 2:
-            return 0.0, 0.0
+        bars = _download(provider, [ticker], interval, timeout, period=period)
+        closes = bars[ticker]["Close"] if ticker in bars else None
+        return _price_change_from_closes(closes, lookback_bars)
 
-        # Use available bars if fewer than requested
-        bars = min(lookback_bars, len(closes) - 1)
-        if bars < 1:
-            return 0.0, float(closes.iloc[-1])
+    except Exception as e:
+        logger.warning("Failed to fetch %s (%s %s): %s", ticker, period, interval, e)
+        return 0.0, 0.0
 
-        start_price = float(closes.iloc[-bars - 1])
-        end_price = float(closes.iloc[-1])
 
-        if start_price == 0:
-            return 0.0, end_price
+def fetch_close_batch(
+    tickers: list[str],
+    period: str,
+    interval: str,
+    timeout: float = 10,
+    provider: MarketDataProvider | None = None,
+) -> dict[str, pd.Series]:
+    """
+    Download Close series for several tickers in a single request.
 
-        pct = ((end_price - start_price) / start_price) * 100.0
-        return pct, end_price
+    Tickers that fail or come back empty are simply absent from the result.
+    """
+    if not tickers:
+        return {}
+    provider = provider or get_provider()
+    try:
+        bars = _download(provider, list(tickers), interval, timeout, period=period)
+        return {t: frame["Close"] for t, frame in bars.items()}
 
     except Exception as e:
-        logger.warning("Failed to fetch %s (%s %s): %s", ticker, period, interval, e)
-        return 0.0, 0.0
+        logger.warning("Failed batch fetch %s (%s %s): %s", tickers, period, interval, e)
+        return {}
 
 
-def get_all_asset_data(settings: Settings | None = None) -> dict[str, Any]:
+def fetch_bars_batch(
+    tickers: list[str],
+    interval: str,
+    period: str | None = None,
+    start: pd.Timestamp | None = None,
+    end: pd.Timestamp | None = None,
+    timeout: float = 10,
+    provider: MarketDataProvider | None = None,
+) -> dict[str, pd.DataFrame]:
+    """
+    Download OHLCV bars for several tickers, either a full `period` or
+    everything from `start` onward (up to `end`, if given).
+    """
+    if not tickers:
+        return {}
+    provider = provider or get_provider()
+    try:
+        return _download(
+            provider, list(tickers), interval, timeout, period=period, start=start, end=end
+        )
+
+    except Exception as e:
+        window = period if start is None else f"{start}..{end or ''}"
+        logger.warning("Failed bar fetch %s (%s %s): %s", tickers, interval, window, e)
+        return {}
+
+
+def _period_span(period: str) -> pd.Timedelta:
+    """Calendar span safely covering a yfinance period, weekends included."""
+    return pd.Timedelta(days=_PERIOD_DAYS.get(period, 31) + 4)
+
+
+def _sync_group(
+    store: BarStore,
+    tickers: list[str],
+    period: str,
+    interval: str,
+    timeout: float = 10,
+    provider: MarketDataProvider | None = None,
+) -> dict[str, pd.Series]:
+    """
+    Bring stored bars up to date and return each ticker's Close window.
+
+    Series with recent stored bars only fetch from their last timestamp
+    (re-fetching that bar, which may still have been forming). Empty or
+    stale series trigger a full `period` download. Freshness is judged by
+    the provider's clock, so replayed and anchored synthetic data work
+    with the store too.
+    """
+    provider = provider or get_provider()
+    span = _period_span(period)
+    now = provider.now()
+    needed_from = now - pd.Timedelta(days=_PERIOD_DAYS.get(period, 31))
+    state = {
+        t: (store.last_timestamp(t, interval), store.covered_from(t, interval))
+        for t in tickers
+    }
+
+    def window(names: list[str]) -> dict[str, Any]:
+        for t in names:
+            last, covered = state[t]
+            if last is None or last < now - span or covered is None or covered > needed_from:
+                return {"period": period}
+        return {"start": min(state[t][0] for t in names)}
+
+    def save(name: str, frame: pd.DataFrame, request: dict[str, Any]) -> None:
+        store.append(name, interval, frame)
+        if "period" in request:
+            store.mark_covered(name, interval, needed_from)
+
+    request = window(tickers)
+    bars = fetch_bars_batch(tickers, interval, timeout=timeout, provider=provider, **request)
+
+    for ticker in tickers:
+        if ticker in bars:
+            save(ticker, bars[ticker], request)
+        elif len(tickers) > 1:
+            # Missing from the batch: retry this ticker alone
+            single = window([ticker])
+            retry = fetch_bars_batch(
+                [ticker], interval, timeout=timeout, provider=provider, **single
+            )
+            if ticker in retry:
+                save(ticker, retry[ticker], single)
+
+    closes: dict[str, pd.Series] = {}
+    for ticker in tickers:
+        series = store.load_closes(ticker, interval, since=now - span, until=now)
+        if not series.empty:
+            closes[ticker] = series
+    return closes
+
+
+def _group_timeframes(settings: Settings) -> dict[tuple[str, str], list[str]]:
+    """Group timeframe keys by their (period, interval) download request."""
+    groups: dict[tuple[str, str], list[str]] = {}
+    for tf_key, tf in settings.timeframes.items():
+        groups.setdefault((tf.period, tf.interval), []).append(tf_key)
+    return groups
+
+
+def bin_starts(index: pd.DatetimeIndex, interval: str) -> pd.DatetimeIndex:
+    """
+    Start time of the `interval` bar each timestamp falls into.
+
+    Intraday bins are anchored on the first bar of the latest day so hourly
+    equity bars keep their :30 session alignment whatever window was
+    downloaded; daily bins follow calendar days in the index timezone.
+    """
+    if interval == "1d":
+        return index.normalize()
+    freq = interval_timedelta(interval)
+    last_day = index[-1].floor("D")
+    session_open = index[index >= last_day][0]
+    origin = index[0].floor("D") + (session_open - last_day) % freq
+    return origin + ((index - origin) // freq) * freq
+
+
+def resample_closes(closes: pd.Series, interval: str) -> pd.Series:
+    """
+    Derive a coarser Close series from finer bars.
+
+    Each output bar takes the last fine close inside it, matching how Yahoo
+    labels bars by their start time (see `bin_starts` for bin alignment).
+    """
+    if closes.empty:
+        return closes
+    return closes.groupby(bin_starts(closes.index, interval)).last().dropna()
+
+
+def _finest_request(settings: Settings) -> tuple[str, str]:
+    """Return the (period, interval) that covers every configured timeframe."""
+    period = max(
+        (tf.period for tf in settings.timeframes.values()),
+        key=lambda p: _PERIOD_DAYS.get(p, 0),
+    )
+    interval = min(
+        (tf.interval for tf in settings.timeframes.values()),
+        key=interval_timedelta,
+    )
+    return period, interval
+
+
+def _fetch_group(
+    tickers: list[str],
+    period: str,
+    interval: str,
+    timeout: float = 10,
+    store: BarStore | None = None,
+    provider: MarketDataProvider | None = None,
+) -> dict[str, pd.Series]:
+    """Batch download, retrying alone any ticker missing from the batch."""
+    if store is not None:
+        return _sync_group(store, tickers, period, interval, timeout=timeout, provider=provider)
+
+    closes = fetch_close_batch(tickers, period, interval, timeout=timeout, provider=provider)
+    for ticker in tickers:
+        if ticker not in closes:
+            closes.update(
+                fetch_close_batch([ticker], period, interval, timeout=timeout, provider=provider)
+            )
+    return closes
+
+
+def _fetch_requests(settings: Settings, mode: str) -> list[tuple[str, str]]:
+    """Distinct (period, interval) downloads needed for a fetch mode."""
+    if mode == "resample":
+        return [_finest_request(settings)]
+    if mode == "batch":
+        return list(_group_timeframes(settings))
+    raise ValueError(f"Unknown fetch mode: {mode!r}")
+
+
+def _closes_by_timeframe(
+    fetched: dict[tuple[str, str], dict[str, pd.Series]],
+    settings: Settings,
+    mode: str,
+) -> dict[str, dict[str, pd.Series] | None]:
+    """
+    Map downloaded batches onto timeframe keys.
+
+    A timeframe maps to None when its download did not finish in time.
+    """
+    closes_by_tf: dict[str, dict[str, pd.Series] | None] = {}
+
+    if mode == "resample":
+        # One download of the finest bars, coarser timeframes derived locally
+        period, interval = _finest_request(settings)
+        fine = fetched.get((period, interval))
+        for tf_key, tf in settings.timeframes.items():
+            if fine is None or tf.interval == interval:
+                closes_by_tf[tf_key] = fine
+            else:
+                closes_by_tf[tf_key] = {
+                    t: resample_closes(series, tf.interval) for t, series in fine.items()
+                }
+        return closes_by_tf
+
+    # One download per distinct (period, interval) instead of per asset
+    for tf_key, tf in settings.timeframes.items():
+        closes_by_tf[tf_key] = fetched.get((tf.period, tf.interval))
+    return closes_by_tf
+
+
+_executor: ThreadPoolExecutor | None = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """
+    Shared bounded pool for market data fetches (one per process).
+
+    The pool is replaced when `max_workers` changes; fetches already
+    running on the old pool finish there.
+    """
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != max_workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="meti-fetch"
+            )
+            _executor_workers = max_workers
+        return _executor
+
+
+def _run_until(
+    calls: dict[Any, Callable[[], Any]],
+    deadline: float,
+    max_workers: int,
+) -> dict[Any, Any]:
+    """
+    Run calls concurrently and collect whatever finishes before `deadline`.
+
+    `deadline` is a time.monotonic() value. Calls that are still running
+    when it passes, or that raise, are left out of the result.
+    """
+    if not calls:
+        return {}
+    executor = _get_executor(max_workers)
+    futures: dict[Future, Any] = {executor.submit(fn): key for key, fn in calls.items()}
+    done, pending = wait(futures, timeout=max(0.0, deadline - time.monotonic()))
+
+    for fut in pending:
+        fut.cancel()
+        logger.warning("Fetch %s missed the refresh deadline", futures[fut])
+
+    results: dict[Any, Any] = {}
+    for fut in done:
+        try:
+            results[futures[fut]] = fut.result()
+        except Exception as e:
+            logger.warning("Fetch %s failed: %s", futures[fut], e)
+    return results
+
+
+def _build_asset_entry(
+    ticker: str,
+    changes: dict[str, float],
+    current_price: float,
+    settings: Settings,
+) -> dict[str, Any]:
+    """Assemble the per-asset dict returned by get_all_asset_data."""
+    asset = settings.assets[ticker]
+
+    # Weighted change across timeframes
+    weighted = 0.0
+    for tf_key, pct in changes.items():
+        weighted += pct * settings.timeframes[tf_key].weight
+
+    return {
+        "ticker": ticker,
+        "name": asset.name,
+        "emoji": asset.emoji,
+        "color": asset.color,
+        "weight": asset.weight,
+        "description": asset.description,
+        "current_price": current_price,
+        "changes": changes,
+        "weighted_change": weighted,
+    }
+
+
+def _is_complete(asset_data: dict[str, Any]) -> bool:
+    """
+    Whether every requested input arrived: no timeframe missed the
+    deadline or failed, and every ticker came back with data. Partial
+    results are not cached, so the next refresh retries them.
+    """
+    return all(
+        not info["missing"] and info["current_price"] > 0 for info in asset_data.values()
+    )
+
+
+@cached(cache_if=_is_complete, copy_result=True)
+def get_all_asset_data(
+    settings: Settings | None = None,
+    mode: str | None = None,
+    provider: MarketDataProvider | None = None,
+) -> dict[str, Any]:
     """
     Fetch multi-timeframe data for every configured asset.
 
+    `mode` overrides `settings.data.fetch_mode`:
+      "batch"    → one multi-ticker download per (period, interval)
+      "resample" → one download of the finest bars, coarser ones derived
+
+    `provider` overrides the backend selected by `data.provider` (Yahoo
+    Finance, recorded replay files or a synthetic market).
+
+    With `data.use_bar_store`, bars are kept in a local SQLite store and
+    each refresh only downloads bars newer than the last stored one.
+
+    Downloads run concurrently on a bounded thread pool. Each request is
+    capped by `data.fetch_timeout_seconds` and the whole refresh by
+    `data.refresh_deadline_seconds`. Inputs that miss the deadline, whose
+    download failed or that came back without data count as 0% and are
+    listed under each asset's "missing" key.
+
+    Complete results (nothing missing, a price for every ticker) are
+    cached for `app.cache_ttl_seconds`. Every call gets its own copy;
+    `get_all_asset_data.fresh(...)` skips the cache and refetches.
+
     Returns a dict:
     {
       "CL=F": {
@@ -100,44 +466,59 @@ def get_all_asset_data(settings: Settings | None = None) -> dict[str, Any]:
           "current_price": 78.5,
           "changes": {"1h": 0.3, "4h": 1.2, ...},
           "weighted_change": 0.85,
+          "missing": [],
           ...
       },
       ...
     }
     """
     settings = settings or get_settings()
-    result: dict[str, Any] = {}
+    data_cfg = settings.data
+    mode = mode or data_cfg.fetch_mode
+    tickers = list(settings.assets)
+    deadline = time.monotonic() + data_cfg.refresh_deadline_seconds
+    provider = provider or get_provider(settings)
+    store = get_bar_store(settings, provider.name) if data_cfg.use_bar_store else None
 
-    for ticker, asset in settings.assets.items():
+    requests = {
+        (period, interval): (
+            lambda p=period, i=interval: _fetch_group(
+                tickers,
+                p,
+                i,
+                timeout=data_cfg.fetch_timeout_seconds,
+                store=store,
+                provider=provider,
+            )
+        )
+        for period, interval in _fetch_requests(settings, mode)
+    }
+    fetched = _run_until(requests, deadline, data_cfg.max_workers)
+    for period, interval in requests.keys() - fetched.keys():
+        _INCOMPLETE_GROUPS.inc(period=period, interval=interval)
+    closes_by_tf = _closes_by_timeframe(fetched, settings, mode)
+
+    result: dict[str, Any] = {}
+    for ticker in tickers:
         changes: dict[str, float] = {}
+        missing: list[str] = []
         current_price = 0.0
 
         for tf_key, tf in settings.timeframes.items():
-            pct, price = fetch_price_change(
-                ticker=ticker,
-                period=tf.period,
-                interval=tf.interval,
-                lookback_bars=tf.lookback_bars,
-            )
+            batch = closes_by_tf[tf_key]
+            closes = None if batch is None else batch.get(ticker)
+            if closes is None or closes.empty:
+                # Deadline miss, failed download or no data for this ticker
+                pct, price = 0.0, 0.0
+                missing.append(tf_key)
+            else:
+                pct, price = _price_change_from_closes(closes, tf.lookback_bars)
             changes[tf_key] = pct
             if price > 0 and current_price == 0.0:
                 current_price = price
 
-        # Weighted change across timeframes
-        weighted = 0.0
-        for tf_key, pct in changes.items():
-            weighted += pct * settings.timeframes[tf_key].weight
-
-        result[ticker] = {
-            "ticker": ticker,
-            "name": asset.name,
-            "emoji": asset.emoji,
-            "color": asset.color,
-            "weight": asset.weight,
-            "description": asset.description,
-            "current_price": current_price,
-            "changes": changes,
-            "weighted_change": weighted,
-        }
+        entry = _build_asset_entry(ticker, changes, current_price, settings)
+        entry["missing"] = missing
+        result[ticker] = entry
 
     return result
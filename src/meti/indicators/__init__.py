@@ -1,3 +1,45 @@
-from .tension import calculate_tension_index, normalize, get_regime
+from __future__ import annotations
 
-__all__ = ["calculate_tension_index", "normalize", "get_regime"]
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+# Exports are imported on first access: tension pulls in numpy
+_EXPORTS = {
+    name: ".tension"
+    for name in (
+        "calculate_tension_index",
+        "normalize",
+        "normalize_array",
+        "get_regime",
+        "REGIMES",
+        "compile_weights",
+        "change_matrix",
+        "raw_index_array",
+    )
+}
+
+if TYPE_CHECKING:
+    from .tension import (
+        calculate_tension_index,
+        normalize,
+        normalize_array,
+        get_regime,
+        REGIMES,
+        compile_weights,
+        change_matrix,
+        raw_index_array,
+    )
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = [
+    "calculate_tension_index",
+    "normalize",
+    "normalize_array",
+    "get_regime",
+    "REGIMES",
+    "compile_weights",
+    "change_matrix",
+    "raw_index_array",
+]
@@ -0,0 +1,200 @@
+"""Vectorized historical backfill of the tension index.
+
+Reconstructs what METI would have read at every bar of a historical
+window: the multi-timeframe percent changes, raw index and 0-100 score
+are computed as NumPy array operations over all timestamps at once and
+bulk-inserted into the history DB.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from meti.config import Settings, get_settings
+from meti.data.backends import MarketDataProvider
+from meti.data.providers import bin_starts, fetch_bars_batch, interval_timedelta
+from meti.indicators.tension import compile_weights, normalize_array, raw_index_array
+
+logger = logging.getLogger(__name__)
+
+
+def _timeframe_changes(
+    closes: pd.Series,
+    interval: str,
+    lookback_bars: int,
+    base_interval: str,
+) -> pd.Series:
+    """
+    Percent change at every fine bar, as the live pipeline would have seen it.
+
+    At a given fine bar the current `interval` bar is still forming, so its
+    close is the latest fine close; the start price is the close of the
+    completed bar `lookback_bars` earlier. Timeframes finer than the input
+    bars keep their time span (e.g. 12 x 5m becomes 4 x 15m).
+    """
+    base = interval_timedelta(base_interval)
+    step = interval_timedelta(interval)
+    if step <= base:
+        bars = max(1, round(lookback_bars * step / base))
+        start = closes.shift(bars)
+    else:
+        labels = bin_starts(closes.index, interval)
+        coarse = closes.groupby(labels).last()
+        start = pd.Series(
+            coarse.shift(lookback_bars).reindex(labels).to_numpy(), index=closes.index
+        )
+    return (closes / start - 1.0) * 100.0
+
+
+def compute_change_tensor(
+    closes: dict[str, pd.Series],
+    base_interval: str,
+    settings: Settings | None = None,
+) -> tuple[pd.DatetimeIndex, np.ndarray, list[str]]:
+    """
+    Multi-timeframe percent changes at every timestamp of historical closes.
+
+    Returns (grid, changes, present): `grid` is the UTC timestamp index,
+    `changes[t, a, f]` the change of asset a over timeframe f at time t,
+    laid out in `compile_weights(settings)` order, and `present` the
+    tickers that had data. Assets without data stay at 0%, as in the live
+    pipeline.
+    """
+    settings = settings or get_settings()
+    weights = compile_weights(settings)
+    timeframes = [settings.timeframes[k] for k in weights.timeframes]
+    present = [t for t in weights.tickers if t in closes and not closes[t].empty]
+    if not present:
+        empty = pd.DatetimeIndex([], tz="UTC")
+        return empty, np.zeros((0, len(weights.tickers), len(timeframes))), present
+
+    per_asset = {}
+    for ticker in present:
+        series = closes[ticker].dropna().sort_index()
+        frame = pd.concat(
+            [
+                _timeframe_changes(series, tf.interval, tf.lookback_bars, base_interval)
+                for tf in timeframes
+            ],
+            axis=1,
+        )
+        frame.index = frame.index.tz_convert("UTC")
+        per_asset[ticker] = frame
+
+    grid = per_asset[present[0]].index
+    for ticker in present[1:]:
+        grid = grid.union(per_asset[ticker].index)
+
+    changes = np.zeros((len(grid), len(weights.tickers), len(timeframes)))
+    for i, ticker in enumerate(weights.tickers):
+        if ticker in per_asset:
+            changes[:, i, :] = per_asset[ticker].reindex(grid, method="ffill").to_numpy()
+
+    # Drop the warm-up before every timeframe has enough history
+    rows = [weights.tickers.index(t) for t in present]
+    valid = ~np.isnan(changes[:, rows, :]).any(axis=(1, 2))
+    return grid[valid], changes[valid], present
+
+
+def compute_backfill(
+    closes: dict[str, pd.Series],
+    base_interval: str,
+    settings: Settings | None = None,
+) -> pd.DataFrame:
+    """
+    Compute the tension index at every timestamp of historical Close series.
+
+    `closes` maps each configured ticker to its Close series sampled at
+    `base_interval`. Series are aligned on the union of their timestamps,
+    each asset carrying its latest reading forward (e.g. LMT outside US
+    hours). Timestamps before every timeframe has enough history are
+    dropped.
+
+    Returns a DataFrame indexed by UTC timestamp with columns raw_index,
+    tension_score and one weighted-change column per ticker.
+    """
+    settings = settings or get_settings()
+    grid, changes, present = compute_change_tensor(closes, base_interval, settings)
+    if not present:
+        return pd.DataFrame(columns=["raw_index", "tension_score"])
+
+    weights = compile_weights(settings)
+    rows = [weights.tickers.index(t) for t in present]
+    weighted = changes[:, rows, :] @ weights.timeframe_weights
+    raw = raw_index_array(changes, weights)
+    norm = settings.normalization
+    score = normalize_array(
+        raw,
+        baseline=norm.baseline,
+        max_positive=norm.max_positive,
+        max_negative=norm.max_negative,
+        clamp_min=norm.clamp_min,
+        clamp_max=norm.clamp_max,
+    )
+
+    result = pd.DataFrame(weighted, index=grid, columns=present)
+    result.insert(0, "tension_score", score)
+    result.insert(0, "raw_index", raw)
+    return result
+
+
+def run_backfill(
+    start: str | datetime,
+    end: str | datetime | None = None,
+    interval: str = "1h",
+    settings: Settings | None = None,
+    provider: MarketDataProvider | None = None,
+) -> int:
+    """
+    Download history for all configured assets, backfill and persist it.
+
+    `provider` defaults to the configured backend. Yahoo limits intraday
+    history (15m: last 60 days, 1h: last 730 days).
+    Previously backfilled rows in the window are replaced, so re-runs are
+    idempotent. With `data.use_bar_store`, the downloaded bars are also
+    kept in the bar store for backtests (`meti.backtest`). Returns the
+    number of snapshots written.
+    """
+    from meti.data.backends import get_provider
+    from meti.data.bars import get_bar_store
+    from meti.data.history import save_snapshots
+
+    settings = settings or get_settings()
+    provider = provider or get_provider(settings)
+    tickers = list(settings.assets)
+    bars = fetch_bars_batch(
+        tickers,
+        interval,
+        start=pd.Timestamp(start),
+        end=pd.Timestamp(end) if end is not None else None,
+        timeout=settings.data.fetch_timeout_seconds * 3,
+        provider=provider,
+    )
+    missing = [t for t in tickers if t not in bars]
+    if missing:
+        logger.warning("Backfill has no data for %s", missing)
+    if settings.data.use_bar_store:
+        store = get_bar_store(settings, provider.name)
+        for ticker, frame in bars.items():
+            store.append(ticker, interval, frame)
+
+    frame = compute_backfill(
+        {t: b["Close"] for t, b in bars.items()}, interval, settings
+    )
+    if frame.empty:
+        return 0
+
+    asset_columns = [t for t in tickers if t in frame.columns]
+    ts_epoch = frame.index.as_unit("ms").asi8
+    return save_snapshots(
+        ts_epoch=ts_epoch,
+        raw_index=frame["raw_index"].to_numpy(),
+        tension_score=frame["tension_score"].to_numpy(),
+        asset_changes={t: frame[t].to_numpy() for t in asset_columns},
+        details=json.dumps({"source": "backfill", "interval": interval}),
+    )
@@ -0,0 +1,175 @@
+"""Streaming tension index with O(1) incremental updates.
+
+Each (ticker, timeframe) keeps a ring buffer of the last
+`lookback_bars + 1` bar closes, the newest one still forming. A tick
+updates that buffer, the asset's percent changes and weighted change,
+and the raw index and score, all in constant time.
+
+Bars are aligned on UTC epoch multiples of the interval (daily bars on
+UTC days), so readings can differ slightly from Yahoo's session-aligned
+bars for equities.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from meti.config import Settings, get_settings
+from meti.data.feeds import Tick, TickFeed
+from meti.data.providers import interval_timedelta
+from meti.indicators.tension import compile_weights, get_regime, normalize
+
+logger = logging.getLogger(__name__)
+
+
+class _BarBuffer:
+    """Closes of the last `lookback_bars + 1` bars; the last one is forming."""
+
+    __slots__ = ("step", "closes", "bar_start")
+
+    def __init__(self, step_seconds: float, lookback_bars: int):
+        self.step = step_seconds
+        self.closes: deque[float] = deque(maxlen=lookback_bars + 1)
+        self.bar_start: float | None = None
+
+    def update(self, ts: float, price: float) -> None:
+        start = ts - ts % self.step
+        if start == self.bar_start:
+            self.closes[-1] = price
+        elif self.bar_start is None or start > self.bar_start:
+            self.closes.append(price)
+            self.bar_start = start
+        # Ticks for an already-closed bar are ignored
+
+    def pct_change(self) -> float:
+        """Percent change across the buffer, like fetch_price_change."""
+        if len(self.closes) < 2 or self.closes[0] == 0:
+            return 0.0
+        return (self.closes[-1] - self.closes[0]) / self.closes[0] * 100.0
+
+
+class StreamingIndex:
+    """Incrementally maintained tension index fed by price ticks."""
+
+    def __init__(self, settings: Settings | None = None):
+        self.settings = settings or get_settings()
+        self.weights = compile_weights(self.settings)
+        tfs = [self.settings.timeframes[k] for k in self.weights.timeframes]
+        self._row = {t: i for i, t in enumerate(self.weights.tickers)}
+        self._buffers = [
+            [
+                _BarBuffer(interval_timedelta(tf.interval).total_seconds(), tf.lookback_bars)
+                for tf in tfs
+            ]
+            for _ in self.weights.tickers
+        ]
+        self.changes = np.zeros((len(self.weights.tickers), len(tfs)))
+        self.weighted = np.zeros(len(self.weights.tickers))
+        self.prices = np.zeros(len(self.weights.tickers))
+        self.raw_index = 0.0
+        self.tension_score = self._normalize(0.0)
+        self.last_ts: float | None = None
+        self.ticks = 0
+
+    def _normalize(self, raw: float) -> int:
+        norm = self.settings.normalization
+        return normalize(
+            raw,
+            baseline=norm.baseline,
+            max_positive=norm.max_positive,
+            max_negative=norm.max_negative,
+            clamp_min=norm.clamp_min,
+            clamp_max=norm.clamp_max,
+        )
+
+    def seed(self, ticker: str, closes: pd.Series) -> None:
+        """Warm a ticker's buffers from historical fine-grained closes."""
+        ts = closes.index.tz_convert("UTC").as_unit("ms").asi8 / 1000.0
+        for t, price in zip(ts, closes.to_numpy(dtype=float)):
+            self._apply(ticker, float(t), float(price))
+        self._recompute_raw()
+
+    def _apply(self, ticker: str, ts: float, price: float) -> bool:
+        row = self._row.get(ticker)
+        if row is None:
+            return False
+        buffers = self._buffers[row]
+        for j, buf in enumerate(buffers):
+            buf.update(ts, price)
+            self.changes[row, j] = buf.pct_change()
+        self.weighted[row] = self.changes[row] @ self.weights.timeframe_weights
+        self.prices[row] = price
+        self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+        return True
+
+    def _recompute_raw(self) -> None:
+        self.raw_index = float(self.weighted @ self.weights.asset_weights)
+        self.tension_score = self._normalize(self.raw_index)
+
+    def update(self, tick: Tick) -> int:
+        """Apply one tick and return the new tension score."""
+        if self._apply(tick.ticker, tick.ts, tick.price):
+            self.ticks += 1
+            self._recompute_raw()
+        return self.tension_score
+
+    def result(self) -> dict[str, Any]:
+        """Current reading in the shape of calculate_tension_index's summary."""
+        ts = self.last_ts if self.last_ts is not None else time.time()
+        return {
+            "raw_index": round(self.raw_index, 4),
+            "tension_score": self.tension_score,
+            "regime": get_regime(self.tension_score),
+            "assets": {
+                ticker: {
+                    "current_price": float(self.prices[i]),
+                    "changes": dict(zip(self.weights.timeframes, self.changes[i].tolist())),
+                    "weighted_change": float(self.weighted[i]),
+                }
+                for i, ticker in enumerate(self.weights.tickers)
+            },
+            "timestamp": datetime.fromtimestamp(ts, tz=timezone.utc).isoformat(),
+        }
+
+    def run(
+        self,
+        feed: TickFeed,
+        on_update: Callable[[StreamingIndex], None] | None = None,
+        persist_interval: float | None = None,
+    ) -> None:
+        """
+        Consume a feed until it ends.
+
+        `on_update` is called after every tick. With `persist_interval`
+        (seconds of feed time), a snapshot is saved at most that often.
+        """
+        last_saved: float | None = None
+        for tick in feed:
+            self.update(tick)
+            if on_update is not None:
+                on_update(self)
+            if persist_interval is not None and (
+                last_saved is None or tick.ts - last_saved >= persist_interval
+            ):
+                self._persist()
+                last_saved = tick.ts
+
+    def _persist(self) -> None:
+        from meti.data.history import save_snapshot
+
+        try:
+            save_snapshot(
+                raw_index=self.raw_index,
+                tension_score=self.tension_score,
+                asset_changes=dict(zip(self.weights.tickers, self.weighted.tolist())),
+                details='{"source": "stream"}',
+            )
+        except Exception:
+            logger.exception("Failed to persist streaming snapshot")
@@ -2,11 +2,20 @@
 
 from __future__ import annotations
 
+import json
 import math
-from typing import Any
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
 
 from meti.config import Settings, get_settings
-from meti.data.providers import get_all_asset_data
+from meti.data.cache import single_flight
+from meti.metrics import STAGE_SECONDS
+from meti.profiling import profiled
+
+if TYPE_CHECKING:
+    from meti.data.backends import MarketDataProvider
 
 
 def normalize(
@@ -62,39 +71,140 @@ def calculate_raw_index(asset_data: dict[str, Any], settings: Settings | None =
     return float(total)
 
 
+def normalize_array(
+    raw_values: np.ndarray,
+    baseline: float = 20.0,
+    max_positive: float = 5.0,
+    max_negative: float = -5.0,
+    clamp_min: float = 0.0,
+    clamp_max: float = 100.0,
+) -> np.ndarray:
+    """Vectorized `normalize`: same mapping over an array, returns int64 scores."""
+    raw = np.asarray(raw_values, dtype=np.float64)
+
+    if max_positive == 0:
+        scaled = np.zeros_like(raw)
+    else:
+        scaled = (raw / max_positive) * (clamp_max - baseline)
+
+    denom = math.log1p(abs(max_negative))
+    if denom == 0:
+        decay = np.zeros_like(raw)
+    else:
+        decay = (np.log1p(np.abs(raw)) / denom) * baseline
+
+    score = np.where(raw >= 0, baseline + scaled, baseline - decay)
+    # np.rint rounds half to even, like Python's round()
+    return np.rint(np.clip(score, clamp_min, clamp_max)).astype(np.int64)
+
+
+@dataclass(frozen=True)
+class CompiledWeights:
+    """Asset and timeframe weights from Settings, laid out as arrays."""
+
+    tickers: tuple[str, ...]
+    timeframes: tuple[str, ...]
+    timeframe_weights: np.ndarray  # (F,)
+    asset_weights: np.ndarray  # (A,) weight * direction
+    matrix: np.ndarray  # (A, F) outer product of the two
+
+
+def compile_weights(settings: Settings | None = None) -> CompiledWeights:
+    """Precompile weight and direction vectors for the array kernels."""
+    settings = settings or get_settings()
+    tickers = tuple(settings.assets)
+    timeframes = tuple(settings.timeframes)
+    tf_weights = np.array([settings.timeframes[k].weight for k in timeframes])
+    asset_weights = np.array(
+        [settings.assets[t].weight * settings.assets[t].direction for t in tickers]
+    )
+    return CompiledWeights(
+        tickers=tickers,
+        timeframes=timeframes,
+        timeframe_weights=tf_weights,
+        asset_weights=asset_weights,
+        matrix=np.outer(asset_weights, tf_weights),
+    )
+
+
+def change_matrix(asset_data: dict[str, Any], weights: CompiledWeights) -> np.ndarray:
+    """Assets × timeframes percent-change matrix from get_all_asset_data output."""
+    changes = np.zeros((len(weights.tickers), len(weights.timeframes)))
+    for i, ticker in enumerate(weights.tickers):
+        info = asset_data.get(ticker)
+        if info is None:
+            continue
+        for j, tf_key in enumerate(weights.timeframes):
+            changes[i, j] = info["changes"].get(tf_key, 0.0)
+    return changes
+
+
+def raw_index_array(changes: np.ndarray, weights: CompiledWeights) -> np.ndarray:
+    """
+    Raw index for one or many change matrices.
+
+    `changes` has shape (..., assets, timeframes); the result drops the last
+    two axes. Equivalent to `calculate_raw_index` up to float summation order:
+    tickers absent from `change_matrix` input count as zero and NaN changes
+    propagate to the result.
+    """
+    return np.tensordot(np.asarray(changes, dtype=np.float64), weights.matrix, axes=2)
+
+
+# Regime labels and the lowest score of each, in ascending order
+REGIMES: tuple[tuple[str, int], ...] = (
+    ("Calm", 0),
+    ("Elevated", 25),
+    ("High", 50),
+    ("Critical", 75),
+)
+
+
 def get_regime(score: int) -> str:
     """Human-readable regime label."""
-    if score < 25:
-        return "Calm"
-    if score < 50:
-        return "Elevated"
-    if score < 75:
-        return "High"
-    return "Critical"
+    label = REGIMES[0][0]
+    for name, lowest in REGIMES:
+        if score >= lowest:
+            label = name
+    return label
 
 
+@profiled("calculate_tension_index")
+@single_flight()
 def calculate_tension_index(
     settings: Settings | None = None,
     persist: bool = True,
+    provider: MarketDataProvider | None = None,
+    fresh: bool = False,
 ) -> dict[str, Any]:
     """
     Full pipeline: fetch data → calculate → optionally save snapshot.
 
+    Concurrent calls with the same arguments share one computation (and
+    write one snapshot); so do calls within `app.coalesce_seconds` of it.
+    `provider` overrides the configured market data backend. `fresh`
+    refetches market data instead of reusing a cached fetch.
+
     Returns a rich dict ready for the UI.
     """
+    from meti.data.providers import get_all_asset_data
+
     settings = settings or get_settings()
-    asset_data = get_all_asset_data(settings)
-
-    raw = calculate_raw_index(asset_data, settings)
-    norm_cfg = settings.normalization
-    score = normalize(
-        raw,
-        baseline=norm_cfg.baseline,
-        max_positive=norm_cfg.max_positive,
-        max_negative=norm_cfg.max_negative,
-        clamp_min=norm_cfg.clamp_min,
-        clamp_max=norm_cfg.clamp_max,
-    )
+    with STAGE_SECONDS.time(stage="fetch"):
+        fetch = get_all_asset_data.fresh if fresh else get_all_asset_data
+        asset_data = fetch(settings, provider=provider)
+
+    with STAGE_SECONDS.time(stage="compute"):
+        raw = calculate_raw_index(asset_data, settings)
+        norm_cfg = settings.normalization
+        score = normalize(
+            raw,
+            baseline=norm_cfg.baseline,
+            max_positive=norm_cfg.max_positive,
+            max_negative=norm_cfg.max_negative,
+            clamp_min=norm_cfg.clamp_min,
+            clamp_max=norm_cfg.clamp_max,
+        )
 
     # Contribution of each asset to the raw index (includes direction)
     contributions = {}
@@ -115,12 +225,16 @@ def calculate_tension_index(
             "color": info["color"],
         }
 
+    # Inputs that did not arrive before the refresh deadline
+    missing = {t: info["missing"] for t, info in asset_data.items() if info.get("missing")}
+
     result = {
         "raw_index": round(raw, 4),
         "tension_score": score,
         "regime": get_regime(score),
         "assets": asset_data,
         "contributions": contributions,
+        "missing_inputs": missing,
         "timestamp": __import__("datetime").datetime.now(
             __import__("datetime").timezone.utc
         ).isoformat(),
@@ -133,11 +247,13 @@ def calculate_tension_index(
             asset_changes = {
                 t: info["weighted_change"] for t, info in asset_data.items()
             }
-            save_snapshot(
-                raw_index=raw,
-                tension_score=score,
-                asset_changes=asset_changes,
-            )
+            with STAGE_SECONDS.time(stage="persist"):
+                save_snapshot(
+                    raw_index=raw,
+                    tension_score=score,
+                    asset_changes=asset_changes,
+                    details=json.dumps({"missing": missing}) if missing else None,
+                )
         except Exception:
             # History is best-effort; never break the main path
             pass
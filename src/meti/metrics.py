@@ -0,0 +1,282 @@
+"""Lightweight timing spans and Prometheus-format metrics for METI.
+
+Stages of a refresh are wrapped in spans that feed latency histograms:
+
+    with FETCH_SECONDS.time(provider="yfinance", interval="15m"):
+        ...
+
+`render()` returns every metric in the Prometheus text exposition format;
+the Gradio app serves it at `metrics.path`. With `metrics.enabled` off,
+`time()` hands back a shared no-op context manager and counters return
+immediately, so instrumented code pays only a flag check.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from functools import wraps
+from typing import Any, Callable, Iterable
+
+# Seconds; spans range from sub-millisecond DB reads to multi-second fetches
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_NULL_SPAN = nullcontext()
+_enabled: bool | None = None
+
+
+def enabled() -> bool:
+    """Whether instrumentation is on (read from settings on first use)."""
+    global _enabled
+    if _enabled is None:
+        from meti.config import get_settings
+
+        _enabled = get_settings().metrics.enabled
+    return _enabled
+
+
+def set_enabled(value: bool) -> None:
+    global _enabled
+    _enabled = value
+
+
+def _label_key(labelnames: tuple[str, ...], labels: dict[str, Any]) -> tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Span:
+    __slots__ = ("_histogram", "_key", "_start")
+
+    def __init__(self, histogram: Histogram, key: tuple[str, ...]):
+        self._histogram = histogram
+        self._key = key
+
+    def __enter__(self) -> _Span:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._histogram._observe(self._key, time.perf_counter() - self._start)
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets, per label set."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [bucket counts..., +Inf count, sum]
+        self._series: dict[tuple[str, ...], list[float]] = {}
+
+    def _observe(self, key: tuple[str, ...], value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if enabled():
+            self._observe(_label_key(self.labelnames, labels), value)
+
+    def time(self, **labels: Any):
+        """Context manager recording the duration of its block."""
+        if not enabled():
+            return _NULL_SPAN
+        return _Span(self, _label_key(self.labelnames, labels))
+
+    def timed(self, **labels: Any) -> Callable:
+        """Decorator form of `time()`."""
+
+        def decorator(fn: Callable) -> Callable:
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            series = {k: list(v) for k, v in self._series.items()}
+        lines = []
+        for key, counts in sorted(series.items()):
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter, per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not enabled():
+            return
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+_registry: dict[str, Histogram | Counter] = {}
+_registry_lock = threading.Lock()
+# Callables returning (name, kind, help, [(labels dict, value), ...]) at scrape time
+_collectors: list[Callable[[], Iterable[tuple[str, str, str, list[tuple[dict, float]]]]]] = []
+
+
+def _register(metric: Any) -> Any:
+    with _registry_lock:
+        existing = _registry.get(metric.name)
+        if existing is not None:
+            return existing
+        _registry[metric.name] = metric
+        return metric
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """Create or return the histogram registered under `name`."""
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    """Create or return the counter registered under `name`."""
+    return _register(Counter(name, documentation, labelnames))
+
+
+def register_collector(
+    fn: Callable[[], Iterable[tuple[str, str, str, list[tuple[dict, float]]]]],
+) -> None:
+    """Add a callable sampled on every scrape (for values kept elsewhere)."""
+    _collectors.append(fn)
+
+
+def _cache_collector():
+    from meti.data.cache import get_cache, get_single_flight
+
+    cache = get_cache().stats()
+    flight = get_single_flight().stats()
+    yield "meti_cache_hits_total", "counter", "Result cache hits.", [({}, cache["hits"])]
+    yield "meti_cache_misses_total", "counter", "Result cache misses.", [({}, cache["misses"])]
+    yield "meti_cache_evictions_total", "counter", "Result cache LRU evictions.", [
+        ({}, cache["evictions"])
+    ]
+    yield "meti_cache_entries", "gauge", "Entries in the result cache.", [({}, cache["size"])]
+    yield "meti_coalesced_calls_total", "counter", "Calls served by a shared in-flight computation.", [
+        ({}, flight["coalesced"])
+    ]
+
+
+register_collector(_cache_collector)
+
+
+def render() -> str:
+    """All metrics in the Prometheus text exposition format (version 0.0.4)."""
+    lines: list[str] = []
+    with _registry_lock:
+        metrics = list(_registry.values())
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        lines.extend(metric.samples())
+    for collector in _collectors:
+        for name, kind, documentation, samples in collector():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = _format_labels(labels.keys(), (str(v) for v in labels.values()))
+                lines.append(f"{name}{label_str} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Metrics shared across modules
+STAGE_SECONDS = histogram(
+    "meti_stage_seconds",
+    "Duration of each stage of a tension computation or dashboard refresh.",
+    ("stage",),
+)
+FETCH_SECONDS = histogram(
+    "meti_fetch_seconds",
+    "Duration of market data downloads.",
+    ("provider", "interval", "scope"),
+)
+FETCH_ERRORS = counter(
+    "meti_fetch_errors_total",
+    "Market data downloads that raised.",
+    ("provider", "interval"),
+)
+FETCH_MISSING = counter(
+    "meti_fetch_missing_total",
+    "Tickers absent from a download's result.",
+    ("ticker", "interval"),
+)
+DB_SECONDS = histogram(
+    "meti_db_seconds",
+    "Duration of history database operations.",
+    ("op",),
+)
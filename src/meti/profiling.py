@@ -0,0 +1,281 @@
+"""Opt-in cProfile/tracemalloc profiling for METI.
+
+Functions decorated with `@profiled(name)` are profiled on every Nth call
+(`profiling.every_n`) or once on demand, via `request_profile()`, SIGUSR1
+or ``python -m meti.profiling request <pid>``. Each capture writes a
+cProfile stats file and, with `profiling.memory`, a tracemalloc snapshot
+to `<data dir>/<profiling.directory>`, keeping the newest
+`profiling.keep` captures per function.
+
+The environment overrides the config without a redeploy:
+METI_PROFILE=1 enables profiling, METI_PROFILE_EVERY=N sets the sampling
+interval.
+
+Summarize captures with ``python -m meti.profiling summarize [paths]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import cProfile
+import inspect
+import io
+import logging
+import os
+import pstats
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _State:
+    enabled: bool
+    every_n: int
+    memory: bool
+    keep: int
+    directory: Path
+
+
+_state: _State | None = None
+_state_lock = threading.Lock()
+_calls: dict[str, int] = {}
+_requested: set[str] = set()  # function names, or "*" for the next profiled call
+# cProfile cannot nest (and on 3.12+ cannot overlap across threads)
+_active = threading.Lock()
+
+
+def _load_state() -> _State:
+    global _state
+    with _state_lock:
+        if _state is None:
+            from meti.config import get_settings
+
+            settings = get_settings()
+            cfg = settings.profiling
+            env = os.environ.get("METI_PROFILE")
+            every = os.environ.get("METI_PROFILE_EVERY")
+            _state = _State(
+                enabled=cfg.enabled if env is None else env.lower() not in ("0", "false", "no", ""),
+                every_n=cfg.every_n if every is None else int(every),
+                memory=cfg.memory,
+                keep=cfg.keep,
+                directory=Path(settings.history.db_path).parent / cfg.directory,
+            )
+        return _state
+
+
+def request_profile(name: str | None = None) -> None:
+    """Profile the next call of `name` (or of any profiled function)."""
+    with _state_lock:
+        _requested.add(name or "*")
+
+
+def install_signal_handler() -> bool:
+    """Make SIGUSR1 request a profile of the next profiled call (POSIX only)."""
+    if not hasattr(signal, "SIGUSR1") or threading.current_thread() is not threading.main_thread():
+        return False
+    signal.signal(signal.SIGUSR1, lambda signum, frame: request_profile())
+    return True
+
+
+def _should_profile(name: str, state: _State, first_call: bool) -> bool:
+    with _state_lock:
+        count = _calls[name] = _calls.get(name, 0) + 1
+        if first_call and count == 1:
+            return True
+        for key in (name, "*"):
+            if key in _requested:
+                _requested.discard(key)
+                return True
+    return state.every_n > 0 and count % state.every_n == 0
+
+
+def _rotate(directory: Path, name: str, keep: int) -> None:
+    captures = sorted(directory.glob(f"{name}-*.prof"), key=lambda p: p.stat().st_mtime)
+    for old in captures[: max(0, len(captures) - keep)]:
+        old.unlink(missing_ok=True)
+        old.with_suffix(".tracemalloc").unlink(missing_ok=True)
+
+
+class _Capture:
+    """One profile capture, possibly spanning several steps (generators)."""
+
+    def __init__(self, name: str, state: _State):
+        self.name = name
+        self.state = state
+        self.started_tracing = state.memory and not tracemalloc.is_tracing()
+        if self.started_tracing:
+            tracemalloc.start(25)
+        self.profiler = cProfile.Profile()
+        self.start = time.perf_counter()
+        self.elapsed = 0.0
+
+    def step(self, fn: Callable, *args, **kwargs) -> Any:
+        start = time.perf_counter()
+        self.profiler.enable()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.profiler.disable()
+            self.elapsed += time.perf_counter() - start
+
+    def finish(self) -> None:
+        state = self.state
+        snapshot = tracemalloc.take_snapshot() if state.memory else None
+        if self.started_tracing:
+            tracemalloc.stop()
+        try:
+            state.directory.mkdir(parents=True, exist_ok=True)
+            stem = (
+                f"{self.name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+                f"-{int(self.start * 1000) % 1000:03d}"
+            )
+            path = state.directory / f"{stem}.prof"
+            self.profiler.dump_stats(path)
+            if snapshot is not None:
+                snapshot.dump(str(path.with_suffix(".tracemalloc")))
+            _rotate(state.directory, self.name, state.keep)
+            logger.info("Profiled %s in %.3fs -> %s", self.name, self.elapsed, path)
+        except OSError:
+            logger.exception("Could not write profile for %s", self.name)
+
+
+def _run_profiled(name: str, state: _State, fn: Callable, args: tuple, kwargs: dict) -> Any:
+    capture = _Capture(name, state)
+    try:
+        return capture.step(fn, *args, **kwargs)
+    finally:
+        capture.finish()
+
+
+def _run_profiled_generator(name: str, state: _State, fn: Callable, args: tuple, kwargs: dict):
+    # Each step is profiled; time the consumer spends between steps is not
+    capture = _Capture(name, state)
+    generator = fn(*args, **kwargs)
+    try:
+        while True:
+            try:
+                value = capture.step(next, generator)
+            except StopIteration as stop:
+                return stop.value
+            yield value
+    finally:
+        generator.close()
+        capture.finish()
+
+
+def profiled(name: str, first_call: bool = False) -> Callable:
+    """
+    Decorator profiling `name` on every Nth call or on request.
+
+    `first_call` also profiles the first call (for one-off startup work).
+    Generator functions are profiled across all their steps into one
+    capture. While profiling is disabled the wrapper only checks a flag.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.isgeneratorfunction(fn):
+
+            @wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                state = _state or _load_state()
+                if not state.enabled or not _should_profile(name, state, first_call):
+                    return (yield from fn(*args, **kwargs))
+                if not _active.acquire(blocking=False):
+                    return (yield from fn(*args, **kwargs))
+                try:
+                    return (yield from _run_profiled_generator(name, state, fn, args, kwargs))
+                finally:
+                    _active.release()
+
+            return generator_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            state = _state or _load_state()
+            if not state.enabled or not _should_profile(name, state, first_call):
+                return fn(*args, **kwargs)
+            if not _active.acquire(blocking=False):
+                # Another capture is running; don't nest profilers
+                return fn(*args, **kwargs)
+            try:
+                return _run_profiled(name, state, fn, args, kwargs)
+            finally:
+                _active.release()
+
+        return wrapper
+
+    return decorator
+
+
+def summarize(paths: list[Path], top: int = 25) -> str:
+    """Top cumulative-time functions and allocation sites of saved captures."""
+    out = io.StringIO()
+    for path in paths:
+        out.write(f"=== {path.name} ===\n")
+        stats = pstats.Stats(str(path), stream=out)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(top)
+
+        memory = path.with_suffix(".tracemalloc")
+        if memory.exists():
+            snapshot = tracemalloc.Snapshot.load(str(memory)).filter_traces(
+                (
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                )
+            )
+            entries = snapshot.statistics("lineno")
+            total = sum(stat.size for stat in entries)
+            out.write(f"Top allocation sites ({total / 1024:.1f} KiB live at end of call):\n")
+            for stat in entries[:top]:
+                frame = stat.traceback[0]
+                out.write(
+                    f"  {stat.size / 1024:10.1f} KiB {stat.count:8d} blocks  "
+                    f"{frame.filename}:{frame.lineno}\n"
+                )
+        out.write("\n")
+    return out.getvalue()
+
+
+def _captures(directory: Path, name: str | None = None) -> list[Path]:
+    pattern = f"{name}-*.prof" if name else "*.prof"
+    return sorted(directory.glob(pattern), key=lambda p: p.stat().st_mtime)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m meti.profiling")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    summary = sub.add_parser("summarize", help="print top functions and allocation sites")
+    summary.add_argument("paths", nargs="*", type=Path, help=".prof files (default: latest)")
+    summary.add_argument("--name", help="only captures of this function")
+    summary.add_argument("--last", type=int, default=1, help="how many recent captures")
+    summary.add_argument("--top", type=int, default=25)
+
+    request = sub.add_parser("request", help="profile the next refresh of a running process")
+    request.add_argument("pid", type=int)
+
+    args = parser.parse_args(argv)
+    if args.command == "request":
+        os.kill(args.pid, signal.SIGUSR1)
+        return 0
+
+    paths = args.paths or _captures(_load_state().directory, args.name)[-args.last :]
+    if not paths:
+        print("No profiles found", file=sys.stderr)
+        return 1
+    print(summarize(paths, top=args.top))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+"""Background snapshot scheduler for METI.
+
+Computes the tension index every `app.refresh_seconds` and persists a
+snapshot every `history.snapshot_interval_minutes`, independently of UI
+traffic. It is the single producer of results: UI handlers read the
+latest one from memory instead of fetching market data inside the
+request, so server work scales with the refresh interval, not with the
+number of viewers.
+
+Run headless with ``python -m meti.scheduler`` or ``meti daemon``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from meti.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotScheduler:
+    """Daemon thread that keeps a fresh tension result in memory."""
+
+    def __init__(
+        self,
+        settings: Settings | None = None,
+        interval_seconds: float | None = None,
+        snapshot_interval_seconds: float | None = None,
+    ):
+        self.settings = settings or get_settings()
+        self.snapshot_interval = (
+            snapshot_interval_seconds
+            if snapshot_interval_seconds is not None
+            else self.settings.history.snapshot_interval_minutes * 60
+        )
+        self.interval = (
+            interval_seconds
+            if interval_seconds is not None
+            else min(self.settings.app.refresh_seconds, self.snapshot_interval)
+        )
+        self._last_persist: float | None = None
+        self._persist_next = False
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._latest: dict[str, Any] | None = None
+        self._latest_at: float | None = None
+        self._generation = 0
+        self._listeners: list[Callable[[dict[str, Any]], Any]] = []
+        self.last_error: BaseException | None = None
+        self.last_run_at: float | None = None
+
+    @property
+    def generation(self) -> int:
+        """Number of completed computations (successful or not)."""
+        with self._cond:
+            return self._generation
+
+    @property
+    def refresh_interval(self) -> float:
+        """Minimum seconds between forced refreshes (app.refresh_min_seconds)."""
+        app = self.settings.app
+        if app.refresh_min_seconds is None:
+            return app.cache_ttl_seconds
+        return app.refresh_min_seconds
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the background thread (no-op if already running)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._loop, name="meti-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def add_listener(self, fn: Callable[[dict[str, Any]], Any]) -> None:
+        """Call `fn(result)` on the scheduler thread after each new result."""
+        self._listeners.append(fn)
+
+    def _persist_due(self) -> bool:
+        if self._persist_next or self._last_persist is None:
+            return True
+        # Small slack so a snapshot interval that is a multiple of the
+        # compute interval doesn't slip by a whole cycle
+        return time.monotonic() - self._last_persist >= self.snapshot_interval - 1.0
+
+    def run_once(
+        self, persist: bool | None = None, fresh: bool | None = None
+    ) -> dict[str, Any] | None:
+        """
+        Compute one result and update the latest one.
+
+        A snapshot is saved when `persist` is true or, by default, when the
+        snapshot interval has elapsed or a manual refresh asked for one.
+        `fresh` refetches market data instead of reusing the fetch cache;
+        by default only a manual refresh does.
+        """
+        from meti.data.bars import prune_bar_store
+        from meti.data.history import prune_old_snapshots
+        from meti.indicators.tension import calculate_tension_index
+
+        fresh = self._persist_next if fresh is None else fresh
+        persist = self._persist_due() if persist is None else persist
+        result = None
+        error = None
+        try:
+            result = calculate_tension_index(
+                settings=self.settings, persist=persist, fresh=fresh
+            )
+            if persist:
+                self._last_persist = time.monotonic()
+                self._persist_next = False
+                prune_old_snapshots(self.settings.history.keep_days)
+                if self.settings.data.use_bar_store:
+                    prune_bar_store(self.settings)
+        except Exception as e:
+            logger.exception("Scheduled tension computation failed")
+            error = e
+
+        with self._cond:
+            if result is not None:
+                self._latest = result
+                self._latest_at = time.monotonic()
+            self.last_error = error
+            self.last_run_at = time.time()
+            self._generation += 1
+            self._cond.notify_all()
+
+        if result is not None:
+            for listener in self._listeners:
+                try:
+                    listener(result)
+                except Exception:
+                    logger.exception("Scheduler listener %r failed", listener)
+        return result
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            self.run_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def latest(self) -> dict[str, Any] | None:
+        """Most recent successful result, or None before the first one."""
+        with self._cond:
+            return self._latest
+
+    def _wait_timeout(self) -> float:
+        # A computation is bounded by the fetch deadline plus local work
+        return self.settings.data.refresh_deadline_seconds + 10
+
+    def wait_for_result(self, timeout: float | None = None) -> dict[str, Any] | None:
+        """Return the latest result, waiting for the first one if needed."""
+        timeout = self._wait_timeout() if timeout is None else timeout
+        with self._cond:
+            self._cond.wait_for(lambda: self._latest is not None, timeout)
+            return self._latest
+
+    def refresh(
+        self, timeout: float | None = None, min_interval: float | None = None
+    ) -> dict[str, Any] | None:
+        """
+        Ask the scheduler to refetch, compute and snapshot now and wait for
+        that computation.
+
+        Refreshes are rate-limited: a result younger than `min_interval`
+        seconds (default `refresh_interval`) is returned as is, so many
+        viewers clicking refresh cause at most one computation and snapshot
+        per interval. Returns the newest successful result, which may be the
+        previous one if the forced computation failed or timed out.
+        """
+        min_interval = self.refresh_interval if min_interval is None else min_interval
+        with self._cond:
+            if (
+                self._latest_at is not None
+                and time.monotonic() - self._latest_at < min_interval
+            ):
+                return self._latest
+            seen = self._generation
+        if not self.running:
+            return self.run_once(persist=True, fresh=True) or self.latest()
+        timeout = self._wait_timeout() if timeout is None else timeout
+        # Refreshes requested before the scheduler picks this one up share it
+        self._persist_next = True
+        self._wake.set()
+        with self._cond:
+            self._cond.wait_for(lambda: self._generation > seen, timeout)
+            return self._latest
+
+
+_scheduler: SnapshotScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler(settings: Settings | None = None) -> SnapshotScheduler:
+    """Process-wide scheduler instance (created on first use, not started)."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = SnapshotScheduler(settings)
+        return _scheduler
+
+
+def start_scheduler(settings: Settings | None = None) -> SnapshotScheduler:
+    """Create (if needed) and start the process-wide scheduler."""
+    scheduler = get_scheduler(settings)
+    scheduler.start()
+    return scheduler
+
+
+def main() -> None:
+    """Run the scheduler in the foreground until interrupted."""
+    from meti.data.history import init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    scheduler = start_scheduler()
+    logger.info(
+        "Scheduler computing every %.0fs, saving snapshots every %.0fs",
+        scheduler.interval,
+        scheduler.snapshot_interval,
+    )
+    try:
+        while scheduler.running:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        scheduler.stop(timeout=5)
+
+
+if __name__ == "__main__":
+    main()
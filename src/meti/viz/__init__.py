@@ -1,3 +1,28 @@
-from .charts import create_tension_gauge, create_history_chart, create_contribution_bar
+from __future__ import annotations
 
-__all__ = ["create_tension_gauge", "create_history_chart", "create_contribution_bar"]
+from typing import TYPE_CHECKING
+
+from .._lazy import lazy_exports
+
+# Exports are imported on first access: charts pull in plotly
+_EXPORTS = {
+    name: ".charts"
+    for name in (
+        "create_tension_gauge",
+        "create_history_chart",
+        "create_contribution_bar",
+        "HistoryChart",
+    )
+}
+
+if TYPE_CHECKING:
+    from .charts import (
+        HistoryChart,
+        create_contribution_bar,
+        create_history_chart,
+        create_tension_gauge,
+    )
+
+__getattr__, __dir__ = lazy_exports(__name__, _EXPORTS)
+
+__all__ = ["create_tension_gauge", "create_history_chart", "create_contribution_bar", "HistoryChart"]
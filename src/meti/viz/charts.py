@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+from bisect import bisect_left
 from typing import Any
 
 import plotly.graph_objects as go
+import plotly.io as pio
 
 from meti.config import Settings, get_settings
 
@@ -64,45 +66,42 @@ def create_tension_gauge(score: int, settings: Settings | None = None) -> go.Fig
     return fig
 
 
-def create_history_chart(snapshots: list[dict[str, Any]]) -> go.Figure:
-    """Simple line chart of historical tension scores."""
-    if not snapshots:
-        fig = go.Figure()
-        fig.add_annotation(
-            text="No historical data yet.<br>Data will appear after the first few refreshes.",
-            xref="paper",
-            yref="paper",
-            x=0.5,
-            y=0.5,
-            showarrow=False,
-            font={"size": 16, "color": "#94a3b8"},
-        )
-        fig.update_layout(
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            height=320,
-            xaxis={"visible": False},
-            yaxis={"visible": False},
-        )
-        return fig
+def _empty_history_chart() -> go.Figure:
+    fig = go.Figure()
+    fig.add_annotation(
+        text="No historical data yet.<br>Data will appear after the first few refreshes.",
+        xref="paper",
+        yref="paper",
+        x=0.5,
+        y=0.5,
+        showarrow=False,
+        font={"size": 16, "color": "#94a3b8"},
+    )
+    fig.update_layout(
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        height=320,
+        xaxis={"visible": False},
+        yaxis={"visible": False},
+    )
+    return fig
 
-    times = [s["ts"][:16].replace("T", " ") for s in snapshots]
-    scores = [s["tension_score"] for s in snapshots]
 
-    fig = go.Figure()
-    fig.add_trace(
-        go.Scatter(
-            x=times,
-            y=scores,
-            mode="lines+markers",
-            line={"color": "#3b82f6", "width": 2.5},
-            marker={"size": 5, "color": "#60a5fa"},
-            name="Tension Score",
-            fill="tozeroy",
-            fillcolor="rgba(59, 130, 246, 0.12)",
-        )
+def _history_trace(times: list[str], scores: list[float], webgl: bool = False) -> go.Scatter | go.Scattergl:
+    trace = go.Scattergl if webgl else go.Scatter
+    return trace(
+        x=times,
+        y=scores,
+        mode="lines+markers",
+        line={"color": "#3b82f6", "width": 2.5},
+        marker={"size": 5, "color": "#60a5fa"},
+        name="Tension Score",
+        fill="tozeroy",
+        fillcolor="rgba(59, 130, 246, 0.12)",
     )
 
+
+def _style_history_chart(fig: go.Figure) -> go.Figure:
     # Reference lines
     for y, color, label in [
         (25, "rgba(16, 185, 129, 0.5)", "Calm"),
@@ -140,6 +139,97 @@ def create_history_chart(snapshots: list[dict[str, Any]]) -> go.Figure:
     return fig
 
 
+def _history_time(point: dict[str, Any]) -> str:
+    return point["ts"][:16].replace("T", " ")
+
+
+def create_history_chart(snapshots: list[dict[str, Any]], webgl_threshold: int = 1000) -> go.Figure:
+    """
+    Simple line chart of historical tension scores.
+
+    Above `webgl_threshold` points the line is drawn with WebGL.
+    """
+    if not snapshots:
+        return _empty_history_chart()
+
+    times = [_history_time(s) for s in snapshots]
+    scores = [s["tension_score"] for s in snapshots]
+
+    fig = go.Figure()
+    fig.add_trace(_history_trace(times, scores, webgl=len(times) > webgl_threshold))
+    return _style_history_chart(fig)
+
+
+class HistoryChart:
+    """
+    History chart kept between refreshes and extended in place.
+
+    The figure layout and reference lines are built once. `update()`
+    replaces points from the first new one onwards and drops points that
+    left the window, so only new snapshots are formatted and a refresh
+    costs the same however long the range. A change of resolution (raw
+    snapshots vs. rollups) needs a full `reset()` first.
+    """
+
+    def __init__(self, webgl_threshold: int = 1000):
+        self.webgl_threshold = webgl_threshold
+        self.resolution: int | None = None
+        self.epochs: list[int] = []
+        self._times: list[str] = []
+        self._scores: list[float] = []
+        self._json: str | None = None
+        # Figure dicts without trace data, rendered on first use
+        self._layout: dict[str, Any] | None = None
+        self._empty_json: str | None = None
+        self._traces: dict[bool, dict[str, Any]] = {}
+
+    @property
+    def last_epoch(self) -> int | None:
+        return self.epochs[-1] if self.epochs else None
+
+    def reset(self, resolution: int | None = None) -> None:
+        self.resolution = resolution
+        self.epochs.clear()
+        self._times.clear()
+        self._scores.clear()
+        self._json = None
+
+    def update(self, points: list[dict[str, Any]], cutoff_epoch: int | None = None) -> int:
+        """
+        Merge `points` (ascending) and drop points before `cutoff_epoch`.
+
+        Returns the number of points added or replaced.
+        """
+        if points:
+            start = bisect_left(self.epochs, points[0]["ts_epoch"])
+            del self.epochs[start:], self._times[start:], self._scores[start:]
+            self.epochs.extend(p["ts_epoch"] for p in points)
+            self._times.extend(_history_time(p) for p in points)
+            self._scores.extend(p["tension_score"] for p in points)
+            self._json = None
+        if cutoff_epoch is not None and self.epochs and self.epochs[0] < cutoff_epoch:
+            stale = bisect_left(self.epochs, cutoff_epoch)
+            del self.epochs[:stale], self._times[:stale], self._scores[:stale]
+            self._json = None
+        return len(points)
+
+    def to_json(self) -> str:
+        """The current figure as Plotly JSON (cached until the next change)."""
+        if not self.epochs:
+            if self._empty_json is None:
+                self._empty_json = _empty_history_chart().to_json()
+            return self._empty_json
+        if self._json is None:
+            if self._layout is None:
+                self._layout = _style_history_chart(go.Figure()).to_plotly_json()["layout"]
+            webgl = len(self.epochs) > self.webgl_threshold
+            if webgl not in self._traces:
+                self._traces[webgl] = _history_trace([], [], webgl=webgl).to_plotly_json()
+            trace = dict(self._traces[webgl], x=self._times, y=self._scores)
+            self._json = pio.to_json({"data": [trace], "layout": self._layout}, validate=False)
+        return self._json
+
+
 def create_contribution_bar(contributions: dict[str, Any]) -> go.Figure:
     """Horizontal bar showing each asset's contribution to the raw index."""
     names = []
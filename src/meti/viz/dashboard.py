@@ -0,0 +1,377 @@
+"""Shared dashboard payload for METI.
+
+Everything the dashboard shows for one tension result (serialized
+Plotly figures, the score box and asset card HTML, the status line) is
+built once when the result arrives and then served as-is to every
+session, so page views cost the same no matter how many people watch.
+
+Payloads are built in stages (score and gauge, then asset cards and the
+contribution bar, then the history chart) and record the version in
+which each field last changed, so pages can be updated progressively
+and only with what actually changed.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from meti.config import Settings, get_settings
+from meti.metrics import STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def render_score_html(result: dict[str, Any]) -> str:
+    """Score box HTML for a tension result."""
+    score = result["tension_score"]
+    regime = result["regime"]
+    raw = result["raw_index"]
+
+    regime_class = {
+        "Calm": "regime-calm",
+        "Elevated": "regime-elevated",
+        "High": "regime-high",
+        "Critical": "regime-critical",
+    }.get(regime, "regime-calm")
+
+    score_html = f"""
+    <div class="score-box">
+      <div class="score-value">{score}</div>
+      <div class="{regime_class}">{regime}</div>
+      <div class="raw-index">Raw index: {raw:+.3f}</div>
+    </div>
+    """
+    return score_html
+
+
+def render_assets_html(result: dict[str, Any]) -> str:
+    """Asset cards HTML, with per-timeframe chips, for a tension result."""
+    # Richer asset cards with per-timeframe chips
+    tf_labels = {"1h": "1H", "4h": "4H", "1d": "1D", "1wk": "1W"}
+    cards = ['<div class="asset-grid">']
+    for ticker, info in result["contributions"].items():
+        change = info["weighted_change"]
+        sign = "▲" if change >= 0 else "▼"
+        ch_class = "asset-change-up" if change >= 0 else "asset-change-down"
+        price = info["current_price"]
+        price_str = f"${price:,.2f}" if price else "—"
+
+        chips = []
+        for tf_key, pct in info.get("changes", {}).items():
+            label = tf_labels.get(tf_key, tf_key)
+            chip_color = "#34d399" if pct >= 0 else "#f87171"
+            chips.append(
+                f'<span class="tf-chip" style="color:{chip_color}">{label} {pct:+.2f}%</span>'
+            )
+        chips_html = "".join(chips)
+
+        cards.append(f"""
+        <div class="asset-card">
+          <div class="asset-header">
+            <div>
+              <span style="font-size:1.25rem">{info['emoji']}</span>
+              <span class="asset-name" style="color:{info['color']}; margin-left:0.35rem">{info['name']}</span>
+              <span class="asset-weight"> · {info['weight']*100:.0f}%</span>
+            </div>
+            <div style="text-align:right">
+              <div class="asset-price">{price_str}</div>
+              <div class="{ch_class}">{sign} {abs(change):.2f}%</div>
+            </div>
+          </div>
+          <div class="tf-row">{chips_html}</div>
+        </div>
+        """)
+    cards.append("</div>")
+    return "\n".join(cards)
+
+
+def status_line(result: dict[str, Any]) -> str:
+    """Markdown status line: update time plus any inputs that were missing."""
+    ts = result["timestamp"][:19].replace("T", " ") + " UTC"
+    status = f"Last updated: **{ts}**"
+    if result.get("missing_inputs"):
+        missing = ", ".join(
+            f"{t} ({'/'.join(tfs)})" for t, tfs in result["missing_inputs"].items()
+        )
+        status += f" · partial data, missing: {missing}"
+    return status
+
+
+# Payload fields in dashboard output order, and the stages they are built in:
+# score and gauge first, then the cards and contribution bar, history last
+FIELDS = (
+    "gauge_json",
+    "score_html",
+    "regime",
+    "assets_html",
+    "contribution_json",
+    "history_json",
+    "status",
+)
+STAGES = (
+    ("gauge_json", "score_html", "regime", "status"),
+    ("assets_html", "contribution_json"),
+    ("history_json",),
+)
+
+# Seconds a request waits for another thread's build to make progress
+# before rendering the payload itself
+FOLLOW_TIMEOUT = 30.0
+
+
+@dataclass(eq=False)
+class DashboardPayload:
+    """
+    Pre-rendered dashboard for one result.
+
+    `version` increases per result; `changed[field]` is the version in
+    which a field last changed, so a page showing version v only needs
+    the fields with `changed[field] > v`. While the payload is being
+    built, `fields` holds only the stages finished so far.
+    """
+
+    version: int
+    result: dict[str, Any]
+    fields: dict[str, Any] = field(default_factory=dict)
+    changed: dict[str, int] = field(default_factory=dict)
+    built_at: float | None = None
+
+    @property
+    def complete(self) -> bool:
+        return self.built_at is not None
+
+    def updates_since(self, seen_version: int) -> dict[str, Any]:
+        """Rendered fields that changed after `seen_version`."""
+        return {
+            name: value
+            for name, value in self.fields.items()
+            if self.changed.get(name, self.version) > seen_version
+        }
+
+
+def _render_stage(
+    stage: tuple[str, ...],
+    result: dict[str, Any],
+    settings: Settings,
+) -> dict[str, Any]:
+    from meti.viz.charts import create_contribution_bar, create_tension_gauge
+
+    rendered: dict[str, Any] = {}
+    for name in stage:
+        if name == "gauge_json":
+            with STAGE_SECONDS.time(stage="ui.gauge"):
+                rendered[name] = create_tension_gauge(result["tension_score"], settings).to_json()
+        elif name == "score_html":
+            with STAGE_SECONDS.time(stage="ui.html"):
+                rendered[name] = render_score_html(result)
+        elif name == "regime":
+            rendered[name] = result["regime"]
+        elif name == "status":
+            rendered[name] = status_line(result)
+        elif name == "assets_html":
+            with STAGE_SECONDS.time(stage="ui.html"):
+                rendered[name] = render_assets_html(result)
+        elif name == "contribution_json":
+            with STAGE_SECONDS.time(stage="ui.contribution"):
+                rendered[name] = create_contribution_bar(result["contributions"]).to_json()
+        elif name == "history_json":
+            rendered[name] = _render_history(settings, settings.history.keep_days)
+    return rendered
+
+
+# The last history chart per (database, range in days) and the history
+# revision it was built from, extended with new snapshots only
+_history_charts: dict[tuple[str, int], tuple[Any, int]] = {}
+_history_lock = threading.Lock()
+
+
+def _render_history(settings: Settings, days: int) -> str:
+    from meti.data.history import get_history, history_cutoff, history_revision
+    from meti.viz.charts import HistoryChart
+
+    key = (settings.history.db_path, days)
+    with _history_lock:
+        with STAGE_SECONDS.time(stage="ui.history_query"):
+            revision = history_revision()
+            chart, built_from = _history_charts.get(key, (None, None))
+            if chart is None:
+                chart = HistoryChart(settings.history.webgl_threshold)
+            elif built_from != revision:
+                # A backfill rewrote rows before the newest one: start over
+                chart.reset()
+            _history_charts[key] = (chart, revision)
+            points = get_history(days=days, since_epoch=chart.last_epoch)
+            resolution = points[0].get("resolution") if points else chart.resolution
+            if resolution != chart.resolution and chart.last_epoch is not None:
+                # Switched between raw snapshots and rollups: start over
+                points = get_history(days=days)
+        with STAGE_SECONDS.time(stage="ui.history_chart"):
+            if resolution != chart.resolution:
+                chart.reset(resolution)
+            chart.update(points, cutoff_epoch=history_cutoff(days, chart.resolution))
+            return chart.to_json()
+
+
+def build_payload(
+    result: dict[str, Any],
+    version: int,
+    settings: Settings | None = None,
+    previous: DashboardPayload | None = None,
+) -> DashboardPayload:
+    """Render every dashboard output for `result` in one go."""
+    payload = DashboardPayload(version=version, result=result)
+    for _ in _build_stages(payload, settings or get_settings(), previous):
+        pass
+    return payload
+
+
+def _build_stages(
+    payload: DashboardPayload,
+    settings: Settings,
+    previous: DashboardPayload | None,
+) -> Iterator[tuple[str, ...]]:
+    """Fill `payload` stage by stage, yielding the names rendered by each."""
+    if previous is not None and previous.version != payload.version - 1:
+        # Change versions are only valid against the direct predecessor
+        previous = None
+    for number, stage in enumerate(STAGES, 1):
+        with STAGE_SECONDS.time(stage=f"ui.stage{number}"):
+            rendered = _render_stage(stage, payload.result, settings)
+        for name, value in rendered.items():
+            unchanged = previous is not None and previous.fields.get(name) == value
+            payload.changed[name] = previous.changed[name] if unchanged else payload.version
+        payload.fields.update(rendered)
+        yield tuple(rendered)
+    payload.built_at = time.time()
+
+
+class PayloadCache:
+    """
+    Holds the payload of the newest result and builds each one once.
+
+    A build publishes every finished stage, so callers streaming the same
+    result receive the score and gauge before the history chart is done.
+    """
+
+    def __init__(self, settings: Settings | None = None):
+        self.settings = settings or get_settings()
+        self._cond = threading.Condition()
+        self._payload: DashboardPayload | None = None  # newest complete payload
+        self._building: list[DashboardPayload] = []
+        self._version = 0
+        self.builds = 0
+        self.hits = 0
+
+    def latest(self) -> DashboardPayload | None:
+        return self._payload
+
+    def _is_current(self, result: dict[str, Any]) -> bool:
+        # A result older than the cached one is served the newer payload
+        payload = self._payload
+        return payload is not None and (
+            payload.result is result or payload.result["timestamp"] > result["timestamp"]
+        )
+
+    def stream(self, result: dict[str, Any]) -> Iterator[DashboardPayload]:
+        """
+        Yield the payload for `result` as its stages become available.
+
+        Yields the partially built payload after each stage, or the
+        complete one once if it is cached. If another thread is already
+        building it, follow that build instead of rendering again.
+        """
+        leader = False
+        with self._cond:
+            if self._is_current(result):
+                self.hits += 1
+                payload = self._payload
+            else:
+                payload = next((p for p in self._building if p.result is result), None)
+                if payload is None:
+                    self._version += 1
+                    payload = DashboardPayload(self._version, result)
+                    self._building.append(payload)
+                    leader = True
+        if payload.complete:
+            yield payload
+        elif leader:
+            yield from self._lead(payload)
+        else:
+            yield from self._follow(payload)
+
+    def _lead(self, payload: DashboardPayload) -> Iterator[DashboardPayload]:
+        finished = False
+        try:
+            for _ in _build_stages(payload, self.settings, self._payload):
+                with self._cond:
+                    self._cond.notify_all()
+                yield payload
+            finished = True
+        finally:
+            with self._cond:
+                self._building.remove(payload)
+                if finished:
+                    self.builds += 1
+                    if self._payload is None or payload.version > self._payload.version:
+                        self._payload = payload
+                self._cond.notify_all()
+
+    def _follow(self, payload: DashboardPayload) -> Iterator[DashboardPayload]:
+        sent = 0
+        while True:
+            with self._cond:
+                progressed = self._cond.wait_for(
+                    lambda: len(payload.fields) > sent or payload not in self._building,
+                    timeout=FOLLOW_TIMEOUT,
+                )
+                ready = len(payload.fields)
+                abandoned = payload not in self._building and not payload.complete
+            if not progressed:
+                # The leader stalled (e.g. its consumer stopped reading)
+                logger.warning("Payload %d build stalled; rendering it here", payload.version)
+                yield from self._build_local(payload.version, payload.result)
+                return
+            if ready > sent:
+                sent = ready
+                yield payload
+            if payload.complete:
+                self.hits += 1
+                return
+            if abandoned:
+                # The leader failed or stopped mid-build (e.g. its page was closed)
+                yield from self.stream(payload.result)
+                return
+
+    def _build_local(self, version: int, result: dict[str, Any]) -> Iterator[DashboardPayload]:
+        """Build a private copy of a payload, publishing it if still the newest."""
+        payload = DashboardPayload(version, result)
+        for _ in _build_stages(payload, self.settings, self._payload):
+            yield payload
+        with self._cond:
+            self.builds += 1
+            if self._payload is None or payload.version > self._payload.version:
+                self._payload = payload
+
+    def get(self, result: dict[str, Any]) -> DashboardPayload:
+        """Complete payload for `result`, building it if needed."""
+        payload = None
+        for payload in self.stream(result):
+            pass
+        return payload
+
+
+_payloads: PayloadCache | None = None
+_payloads_lock = threading.Lock()
+
+
+def get_payload_cache(settings: Settings | None = None) -> PayloadCache:
+    """Process-wide payload cache."""
+    global _payloads
+    with _payloads_lock:
+        if _payloads is None:
+            _payloads = PayloadCache(settings)
+        return _payloads
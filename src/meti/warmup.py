@@ -0,0 +1,133 @@
+"""Warm start for METI.
+
+At process start the scheduler computes the first tension result in the
+background (seeding the data cache); the warm-up thread then renders the
+dashboard once, so plotly is imported, the history DB is paged in and the
+figures for that result are ready before the first visitor arrives.
+
+`status()` reports the phase for readiness probes: health checks should
+only pass once it says ready.
+"""
+
+from __future__ import annotations
+
+import inspect
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from meti.config import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class WarmUp:
+    """Background warm-up: first result, then a first render."""
+
+    def __init__(
+        self,
+        settings: Settings | None = None,
+        render: Callable[[], Any] | None = None,
+    ):
+        self.settings = settings or get_settings()
+        self.render = render
+        self.phase = "idle"
+        self.error: str | None = None
+        self.attempts = 0
+        self.started_at: float | None = None
+        self.ready_at: float | None = None
+        self._ready = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Block until warm (or `timeout`); returns whether it is ready."""
+        return self._ready.wait(timeout)
+
+    def start(self) -> None:
+        """Start warming up in a daemon thread (no-op if already started)."""
+        if self._thread is not None:
+            return
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="meti-warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        from meti.scheduler import start_scheduler
+
+        scheduler = start_scheduler(self.settings)
+        retry = self.settings.app.warmup_retry_seconds
+        self.phase = "fetching"
+        result = scheduler.wait_for_result()
+        while result is None:
+            # The first computation failed or is still running; retry sooner
+            # than the regular snapshot interval would
+            self.attempts += 1
+            self.phase = "retrying"
+            self.error = repr(scheduler.last_error) if scheduler.last_error else "timed out"
+            logger.warning("Warm-up has no result yet (%s); retrying in %.0fs", self.error, retry)
+            time.sleep(retry)
+            retry = min(retry * 2, 300.0)
+            self.phase = "fetching"
+            result = scheduler.refresh()
+
+        if self.render is not None:
+            self.phase = "rendering"
+            try:
+                rendered = self.render()
+                if inspect.isgenerator(rendered):
+                    # A progressive render: run it to the end
+                    for _ in rendered:
+                        pass
+            except Exception as e:
+                # The data is warm; a render failure shouldn't keep us unready
+                logger.exception("Warm-up render failed")
+                self.error = repr(e)
+
+        self.phase = "ready"
+        self.ready_at = time.time()
+        self._ready.set()
+        logger.info("Warm-up finished in %.1fs", self.ready_at - self.started_at)
+
+    def status(self) -> dict[str, Any]:
+        """Readiness report for health checks."""
+        now = time.time()
+        return {
+            "ready": self.ready,
+            "phase": self.phase,
+            "attempts": self.attempts,
+            "error": self.error,
+            "uptime_seconds": round(now - self.started_at, 3) if self.started_at else 0.0,
+            "warmup_seconds": (
+                round(self.ready_at - self.started_at, 3) if self.ready_at and self.started_at else None
+            ),
+        }
+
+
+_warmup: WarmUp | None = None
+_warmup_lock = threading.Lock()
+
+
+def get_warmup(settings: Settings | None = None) -> WarmUp:
+    """Process-wide warm-up instance (created on first use, not started)."""
+    global _warmup
+    with _warmup_lock:
+        if _warmup is None:
+            _warmup = WarmUp(settings)
+        return _warmup
+
+
+def start_warmup(
+    settings: Settings | None = None,
+    render: Callable[[], Any] | None = None,
+) -> WarmUp:
+    """Create (if needed) and start the process-wide warm-up."""
+    warmup = get_warmup(settings)
+    if render is not None and warmup.render is None:
+        warmup.render = render
+    warmup.start()
+    return warmup
@@ -0,0 +1,29 @@
+"""Shared fixtures for the test suite."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from meti.config import get_settings
+from meti.data import history
+
+
+@pytest.fixture
+def history_db(tmp_path, monkeypatch):
+    """Point the history layer at an empty database for one test."""
+    monkeypatch.setattr(get_settings().history, "db_path", str(tmp_path / "history.db"))
+    history.init_db()
+    yield
+    history.close_db()
+
+
+def seed_snapshots(ts_epoch: list[int], scores: list[float], source: str) -> None:
+    """Bulk-write snapshots the way a backfill does."""
+    history.save_snapshots(
+        ts_epoch=ts_epoch,
+        raw_index=[s / 100 for s in scores],
+        tension_score=scores,
+        details=json.dumps({"source": source}),
+    )
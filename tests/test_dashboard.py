@@ -0,0 +1,48 @@
+"""The incrementally updated history chart vs. a full rebuild."""
+
+from __future__ import annotations
+
+import json
+import time
+
+from conftest import seed_snapshots
+
+from meti.config import get_settings
+from meti.data import history
+from meti.viz.charts import create_history_chart
+from meti.viz.dashboard import _render_history
+
+DAYS = 30
+
+
+def _trace(figure_json: str) -> tuple[list, list]:
+    data = json.loads(figure_json)["data"]
+    return (data[0]["x"], data[0]["y"]) if data else ([], [])
+
+
+def _assert_matches_full_rebuild(settings) -> None:
+    full = create_history_chart(history.get_history(days=DAYS)).to_json()
+    assert _trace(_render_history(settings, DAYS)) == _trace(full)
+
+
+def test_incremental_history_chart_matches_full_rebuild(history_db):
+    settings = get_settings()
+    now = int(time.time() * 1000)
+    minute = 60_000
+    older = [now - (100 - i) * 10 * minute for i in range(50)]
+    seed_snapshots(older, [20 + i % 7 for i in range(50)], "stream")
+    _assert_matches_full_rebuild(settings)
+
+    history.save_snapshot(raw_index=0.4, tension_score=40)
+    history.save_snapshot(raw_index=0.5, tension_score=55)
+    _assert_matches_full_rebuild(settings)
+
+    # A backfill lands between rows the chart already shows
+    backfill = [t + 5 * minute for t in older]
+    seed_snapshots(backfill, [60] * len(backfill), "backfill")
+    _assert_matches_full_rebuild(settings)
+
+    # Re-running it replaces its rows
+    seed_snapshots(backfill, [70] * len(backfill), "backfill")
+    _assert_matches_full_rebuild(settings)
+    assert _trace(_render_history(settings, DAYS))[1].count(70) == len(backfill)
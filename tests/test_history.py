@@ -0,0 +1,47 @@
+"""Tests for the SQLite history layer."""
+
+from __future__ import annotations
+
+import time
+
+from conftest import seed_snapshots
+
+from meti.data import history
+
+
+def _seed(count: int, step_seconds: int) -> None:
+    # Start on a day boundary so every rollup bucket is full
+    now = int(time.time() * 1000)
+    day = 86400 * 1000
+    start = now - now % day - day
+    seed_snapshots(
+        [start + i * step_seconds * 1000 for i in range(count)], [30] * count, "test"
+    )
+
+
+def test_sparse_history_keeps_finest_rollup(history_db):
+    # 600 snapshots 5 minutes apart: two days of data in a 30-day window
+    # fit as 200 buckets of 15 minutes, not 30 daily points
+    _seed(600, 300)
+    points = history.get_history(days=30, target_points=500)
+
+    assert {p["resolution"] for p in points} == {900}
+    assert len(points) == 200
+    assert sum(p["n"] for p in points) == 600
+
+
+def test_raw_snapshots_returned_when_they_fit(history_db):
+    _seed(100, 300)
+    points = history.get_history(days=30, target_points=500)
+
+    assert len(points) == 100
+    assert all("resolution" not in p for p in points)
+
+
+def test_dense_history_falls_back_to_coarser_rollup(history_db):
+    # 15-minute buckets no longer fit, hourly ones do
+    _seed(3000, 60)
+    points = history.get_history(days=30, target_points=60)
+
+    assert {p["resolution"] for p in points} == {3600}
+    assert len(points) == 50
@@ -0,0 +1,29 @@
+"""Tests for the background snapshot scheduler."""
+
+from __future__ import annotations
+
+from meti.config import get_settings
+from meti.indicators import tension
+from meti.scheduler import SnapshotScheduler
+
+
+def test_refresh_is_rate_limited(monkeypatch):
+    calls = []
+
+    def compute(**kwargs):
+        calls.append(kwargs)
+        return {"tension_score": len(calls)}
+
+    monkeypatch.setattr(tension, "calculate_tension_index", compute)
+    monkeypatch.setattr("meti.data.history.prune_old_snapshots", lambda days: 0)
+    settings = get_settings().model_copy(deep=True)
+    settings.data.use_bar_store = False
+    scheduler = SnapshotScheduler(settings)
+
+    first = scheduler.refresh()
+    # Other viewers clicking refresh right after get the same result
+    assert scheduler.refresh() is first
+    assert calls == [{"settings": settings, "persist": True, "fresh": True}]
+
+    assert scheduler.refresh(min_interval=0) == {"tension_score": 2}
+    assert len(calls) == 2
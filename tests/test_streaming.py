@@ -0,0 +1,59 @@
+"""Streaming index vs the vectorized backfill on the same bars."""
+
+from __future__ import annotations
+
+import csv
+
+import numpy as np
+import pandas as pd
+
+from meti.config import get_settings
+from meti.data.feeds import ReplayFeed
+from meti.indicators.backfill import compute_backfill
+from meti.indicators.streaming import StreamingIndex
+
+
+def _closes(tickers: list[str], days: int = 8) -> dict[str, pd.Series]:
+    """Continuous 5-minute random walks on the UTC grid, one per ticker."""
+    index = pd.date_range("2025-03-01", periods=days * 288, freq="5min", tz="UTC")
+    rng = np.random.default_rng(5)
+    return {
+        ticker: pd.Series(
+            100.0 * np.exp(np.cumsum(rng.normal(0, 0.002, len(index)))), index=index
+        )
+        for ticker in tickers
+    }
+
+
+def test_replay_feed_through_streaming_matches_backfill(tmp_path):
+    settings = get_settings()
+    # Leave one ticker out: both paths hold it at 0%
+    closes = _closes(list(settings.assets)[:-1])
+    backfill = compute_backfill(closes, "5m", settings)
+    assert len(backfill) > 100
+
+    ticks = sorted(
+        (ts.timestamp(), ticker, price)
+        for ticker, series in closes.items()
+        for ts, price in series.items()
+    )
+    path = tmp_path / "ticks.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["ts", "ticker", "price"])
+        writer.writerows((repr(ts), ticker, repr(price)) for ts, ticker, price in ticks)
+
+    # Reading once every ticker has ticked at a timestamp
+    readings: dict[float, tuple[float, int]] = {}
+    StreamingIndex(settings).run(
+        ReplayFeed(path),
+        on_update=lambda index: readings.__setitem__(
+            index.last_ts, (index.raw_index, index.tension_score)
+        ),
+    )
+
+    streamed = [readings[ts.timestamp()] for ts in backfill.index]
+    np.testing.assert_allclose(
+        [raw for raw, _ in streamed], backfill["raw_index"], rtol=1e-9, atol=1e-9
+    )
+    assert [score for _, score in streamed] == backfill["tension_score"].tolist()
@@ -0,0 +1,78 @@
+"""Tests for the tension index kernels."""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from meti.backtest import _summarize
+from meti.config import get_settings
+from meti.data.providers import _build_asset_entry
+from meti.indicators.tension import (
+    calculate_raw_index,
+    change_matrix,
+    compile_weights,
+    get_regime,
+    normalize,
+    normalize_array,
+    raw_index_array,
+)
+
+
+def _random_asset_data(rng: np.random.Generator, settings, nan_rate: float = 0.0):
+    """get_all_asset_data-shaped dict with random changes, some tickers left out."""
+    data = {}
+    for ticker in settings.assets:
+        if rng.random() < 0.2:
+            continue  # ticker missing from the fetch
+        changes = {
+            tf: float("nan") if rng.random() < nan_rate else float(rng.normal(0, 3))
+            for tf in settings.timeframes
+        }
+        data[ticker] = _build_asset_entry(ticker, changes, 1.0, settings)
+    # Unconfigured tickers are ignored by both paths
+    data["XYZ"] = {"changes": {tf: 1.0 for tf in settings.timeframes}, "weighted_change": 1.0}
+    return data
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_raw_index_array_matches_scalar(seed):
+    settings = get_settings()
+    weights = compile_weights(settings)
+    rng = np.random.default_rng(seed)
+    samples = [_random_asset_data(rng, settings) for _ in range(8)]
+
+    batch = raw_index_array(np.stack([change_matrix(d, weights) for d in samples]), weights)
+
+    expected = [calculate_raw_index(d, settings) for d in samples]
+    np.testing.assert_allclose(batch, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_raw_index_array_propagates_nan_like_scalar():
+    settings = get_settings()
+    weights = compile_weights(settings)
+    rng = np.random.default_rng(0)
+    samples = [_random_asset_data(rng, settings, nan_rate=0.3) for _ in range(50)]
+
+    batch = raw_index_array(np.stack([change_matrix(d, weights) for d in samples]), weights)
+
+    expected = [calculate_raw_index(d, settings) for d in samples]
+    assert np.isnan(expected).any() and not np.isnan(expected).all()
+    np.testing.assert_allclose(batch, expected, rtol=1e-12, atol=1e-12, equal_nan=True)
+
+
+def test_normalize_array_matches_scalar():
+    raw = np.random.default_rng(1).normal(0, 4, 1000)
+    raw[:3] = (0.0, -0.0, 100.0)
+    np.testing.assert_array_equal(normalize_array(raw), [normalize(r) for r in raw])
+
+
+def test_regime_labels_and_backtest_shares_use_the_same_thresholds():
+    scores = np.arange(0, 101)
+    stats = _summarize(scores, scores.astype(float))
+    for name in ("Calm", "Elevated", "High", "Critical"):
+        expected = np.mean([get_regime(int(s)) == name for s in scores])
+        assert stats[f"share_{name.lower()}"] == pytest.approx(expected)
+    assert [get_regime(s) for s in (0, 24, 25, 49, 50, 74, 75, 100)] == [
+        "Calm", "Calm", "Elevated", "Elevated", "High", "High", "Critical", "Critical"
+    ]